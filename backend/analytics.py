@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from config import db
+from models import MenuItem, MenuItemDailySales, Order, OrderItem, Outlet, OutletDailySales, Reservation
+
+COMPLETED_STATUSES = ('delivered', 'completed')
+
+
+def _scoped_orders(owner_id=None, outlet_id=None):
+    """Ids of the orders containing at least one item from the scoped outlets."""
+    scoped = select(OrderItem.order_id).join(MenuItem, OrderItem.menuitem_id == MenuItem.id)
+    if outlet_id is not None:
+        scoped = scoped.where(MenuItem.outlet_id == outlet_id)
+    if owner_id is not None:
+        scoped = scoped.join(Outlet, MenuItem.outlet_id == Outlet.id).where(Outlet.owner_id == owner_id)
+    return scoped
+
+
+def _scoped_outlets(query, outlet_column, owner_id=None, outlet_id=None):
+    if outlet_id is not None:
+        query = query.where(outlet_column == outlet_id)
+    if owner_id is not None:
+        query = query.join(Outlet, outlet_column == Outlet.id).where(Outlet.owner_id == owner_id)
+    return query
+
+
+def summary(owner_id=None, outlet_id=None, day=None):
+    """Dashboard figures computed entirely in SQL.
+
+    Revenue is the sum of order item subtotals, so a scoped summary only
+    counts the lines that belong to the owner's (or outlet's) menu. Order
+    counts and the completion rate count every order that contains at least
+    one scoped line. Revenue and the top dish are read from the daily sales
+    rollups rather than from `order_items`.
+    """
+    day = day or datetime.now(timezone.utc).date()
+    day_start = datetime.combine(day, datetime.min.time())
+    day_end = day_start + timedelta(days=1)
+    scoped = owner_id is not None or outlet_id is not None
+
+    orders = select(
+        func.count(Order.id),
+        func.count(Order.id).filter(Order.created_at >= day_start, Order.created_at < day_end),
+        func.count(Order.id).filter(func.lower(Order.status).in_(COMPLETED_STATUSES)),
+    )
+    if scoped:
+        orders = orders.where(Order.id.in_(_scoped_orders(owner_id, outlet_id)))
+    total_orders, orders_today, completed = db.session.execute(orders).one()
+
+    sales = _scoped_outlets(
+        select(
+            func.coalesce(func.sum(OutletDailySales.revenue), 0),
+            func.coalesce(func.sum(OutletDailySales.revenue).filter(OutletDailySales.day == day), 0),
+        ),
+        OutletDailySales.outlet_id, owner_id, outlet_id,
+    )
+    total_revenue, revenue_today = db.session.execute(sales).one()
+
+    dish_quantity = func.sum(MenuItemDailySales.quantity)
+    top_dish = db.session.execute(
+        _scoped_outlets(
+            select(MenuItem.id, MenuItem.name, dish_quantity.label('quantity'))
+            .join(MenuItemDailySales, MenuItemDailySales.menu_item_id == MenuItem.id),
+            MenuItem.outlet_id, owner_id, outlet_id,
+        )
+        .group_by(MenuItem.id, MenuItem.name)
+        .order_by(dish_quantity.desc(), MenuItem.id)
+        .limit(1)
+    ).first()
+
+    reservations = select(func.count(Reservation.id))
+    if scoped:
+        reservations = reservations.where(Reservation.order_id.in_(_scoped_orders(owner_id, outlet_id)))
+    total_reservations = db.session.execute(reservations).scalar()
+
+    return {
+        "date": day.isoformat(),
+        "owner_id": owner_id,
+        "outlet_id": outlet_id,
+        "total_reservations": total_reservations,
+        "total_orders": total_orders,
+        "orders_today": orders_today,
+        "total_revenue": float(total_revenue),
+        "revenue_today": float(revenue_today),
+        "completion_rate": round(completed * 100 / total_orders) if total_orders else 0,
+        "most_ordered_dish": (
+            {"id": top_dish.id, "name": top_dish.name, "quantity": top_dish.quantity}
+            if top_dish else None
+        ),
+    }
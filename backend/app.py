@@ -1,18 +1,50 @@
 #!/usr/bin/env python3
 
-from flask import request, session
-from flask_restful import Resource
+from datetime import date, datetime
+
+import click
+from flask import Flask, Response, current_app, request, session
+from flask_restful import Resource, abort
+from sqlalchemy import insert, select
 from sqlalchemy.exc import IntegrityError
 from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity,  get_jwt
 
-from config import app, db, api, jwt, jwt_blacklist
-from models import User, Cuisine, Outlet, MenuItem, Table, Order, OrderItem, Reservation
+from config import Config, db, api, bcrypt, cors, jwt
+from database import engine_options, init_sqlite, sqlite_pragmas
+from loading import eager, init_query_debug
+from cache import catalog_cache
+from revocation import revocations
+from order_stream import order_hub
+import metrics
+from metrics import request_metrics
+from passwords import hasher, PasswordHasherBusy
+import users
+from models import INTEGER_MAX, User, Cuisine, Outlet, MenuItem, Table, Order, OrderItem, Reservation
+from pagination import paginate
+import fieldsets
+import analytics
+import availability
+import batch
+import datagen
+import menus
+import search
+import representations
+import rollups  # registers the rollup flush hooks
+
+
+def invalidate_outlet(outlet_id):
+    # Deleting an outlet cascades to its menu items.
+    catalog_cache.invalidate(f'outlet:{outlet_id}', f'menu_item:outlet_id={outlet_id}')
 
-@app.route('/')
 def home():
     return "<h1>Welcome to NextGen Food Court APIs</h1>"
      
 # ------------------ AUTH ------------------ #
+def busy_response():
+    return {"error": "Too many sign-in attempts in progress, please retry."}, 503, {
+        'Retry-After': str(hasher.retry_after)
+    }
+
 class Register(Resource):
     def post(self):
         data = request.get_json()
@@ -27,15 +59,30 @@ class Register(Resource):
             db.session.add(user)
             db.session.commit()
             return {"message": "User registered successfully"}, 201
-        except IntegrityError:
+        except IntegrityError as error:
+            db.session.rollback()
+            return {"message": users.conflict_message(error)}, 400
+        except PasswordHasherBusy:
             db.session.rollback()
-            return {"message": "User already exists"}, 400
+            return busy_response()
 
 class Login(Resource):
     def post(self):
         data = request.get_json()
         user = User.query.filter_by(email=data['email']).first()
-        if user and user.authenticate(data['password']):
+        try:
+            authenticated = user is not None and user.authenticate(data['password'])
+        except PasswordHasherBusy:
+            return busy_response()
+        if authenticated and hasher.needs_rehash(user._password_hash):
+            # Upgrade hashes made with an older cost factor while we have the password.
+            try:
+                user.password_hash = data['password']
+                db.session.commit()
+            except PasswordHasherBusy:
+                # Nothing was assigned and the old hash still verifies; upgrade on a later login.
+                pass
+        if authenticated:
             access_token = create_access_token(identity={'id': user.id, 'role': user.role})
             return {"access_token": access_token, "user": user.to_dict(rules=('-orders', '-reservations', '-outlets'))}, 200
         return {"message": "Invalid credentials"}, 401
@@ -43,8 +90,8 @@ class Login(Resource):
 class Logout(Resource):
     @jwt_required()
     def post(self):
-        jti = get_jwt()["jti"] 
-        jwt_blacklist.add(jti)
+        token = get_jwt()
+        revocations.revoke(token["jti"], token["exp"])
         return {"message": "Successfully logged out"}, 200
 
 class CheckAuth(Resource):
@@ -55,15 +102,34 @@ class CheckAuth(Resource):
 
 # ------------------ USERS ------------------ #
 class UserLists(Resource):
+    filters = {'role': User.role}
+
     @jwt_required()
     def get(self):
-        return [user.to_dict(rules=('-orders', '-reservations', '-outlets')) for user in User.query.all()]
+        serialize, options = fieldsets.sparse(User, ('-orders', '-reservations', '-outlets'))
+        return paginate(User.query, User, serialize, self.filters, options=options)
+
+class UserBulkCreate(Resource):
+    @jwt_required()
+    def post(self):
+        data = request.get_json()
+        if not isinstance(data, list):
+            return {"error": "Expected a list of users."}, 400
+        created, errors, retry_from = users.bulk_create(data)
+        if retry_from is not None:
+            # Rows before retry_from are committed; the client resends the rest.
+            body, status, headers = busy_response()
+            body.update(error=f"Password hashing is at capacity; resend the rows from index {retry_from}.",
+                        created=created, errors=errors, retry_from=retry_from)
+            return body, status, headers
+        return {"created": created, "errors": errors}, 201 if created else 400
 
 class UserDetails(Resource):
     @jwt_required()
     def get(self, id):
-        user = User.query.get(id)
-        return user.to_dict(rules=('-orders', '-reservations', '-outlets'))
+        serialize, options = fieldsets.sparse(User, ('-orders', '-reservations', '-outlets'))
+        user = User.query.options(*options).get(id)
+        return serialize(user)
 
     @jwt_required()
     def patch(self, id):
@@ -80,31 +146,43 @@ class UserDetails(Resource):
         if 'phone_no' in data:
             user.phone_no = data['phone_no']
             
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as error:
+            db.session.rollback()
+            return {"error": users.conflict_message(error)}, 400
         return user.to_dict(rules=('-orders', '-reservations', '-outlets')) 
     
     @jwt_required()
     def delete(self, id):
        user = User.query.get(id)
+       outlet_ids = [outlet.id for outlet in user.outlets]
        db.session.delete(user)
        db.session.commit()
+       for outlet_id in outlet_ids:
+           invalidate_outlet(outlet_id)
        return {"message": "User deleted Successfully"}
 
 # ------------------ CUISINES ------------------ #
 class CuisineList(Resource):
+    @catalog_cache.cached('cuisine')
     def get(self):
-        return [cuisine.to_dict(rules=('-outlets',)) for cuisine in Cuisine.query.all()]
+        serialize, options = fieldsets.sparse(Cuisine, ('-outlets',))
+        return [serialize(cuisine) for cuisine in Cuisine.query.options(*options).all()]
     
     def post(self):
         data = request.get_json()
         cuisine = Cuisine(name=data['name'])
         db.session.add(cuisine)
         db.session.commit()
+        catalog_cache.invalidate('cuisine:list')
         return cuisine.to_dict(rules=('-outlets',)), 201
     
 class CuisineDetails(Resource):
+    @catalog_cache.cached('cuisine')
     def get(self, id):
-        return Cuisine.query.get(id).to_dict(rules=('-outlets',))
+        serialize, options = fieldsets.sparse(Cuisine, ('-outlets',))
+        return serialize(Cuisine.query.options(*options).get(id))
 
     def patch(self, id):
         data = request.get_json()
@@ -116,19 +194,28 @@ class CuisineDetails(Resource):
         if 'name' in data:
             cuisine.name = data['name']
         db.session.commit()
+        catalog_cache.invalidate(f'cuisine:{id}')
         return cuisine.to_dict(rules=('-outlets',))
             
     def delete(self, id):
         cuisine = Cuisine.query.get(id)
+        outlet_ids = [outlet.id for outlet in cuisine.outlets]
         db.session.delete(cuisine)
         db.session.commit()
+        catalog_cache.invalidate(f'cuisine:{id}')
+        for outlet_id in outlet_ids:
+            invalidate_outlet(outlet_id)
         return {"message": "Cuisine deleted successfully"}
 
 # ------------------ OUTLETS ------------------ #
 class OutletLists(Resource):
+    filters = {'cuisine_id': Outlet.cuisine_id, 'owner_id': Outlet.owner_id}
+
+    @catalog_cache.cached('outlet', fields=tuple(filters), related={'cuisine_id': 'cuisine'})
     def get(self):
-        outlets = Outlet.query.all()
-        return [outlet.to_dict(rules=( '-menu_items', '-owner',)) for outlet in outlets]   
+        serialize, options = fieldsets.sparse(Outlet, ('-menu_items', '-owner'), eager_paths=('cuisine',),
+                                              keep=(*self.filters, 'cuisine_id'))
+        return paginate(Outlet.query, Outlet, serialize, self.filters, options=options)
 
     def post(self):
        data = request.get_json()
@@ -143,20 +230,25 @@ class OutletLists(Resource):
            )
            db.session.add(outlet)
            db.session.commit()
+           catalog_cache.invalidate('outlet:list')
            return outlet.to_dict(rules=('-cuisine', '-menu_items', '-owner',)), 201
        except IntegrityError:
            db.session.rollback()
            return {"message": "Outlet already exists or invalid data"}, 400
 
 class OutletDetails(Resource):
+    load_options = eager(Outlet, 'cuisine', 'menu_items', 'owner')
+
+    @catalog_cache.cached('outlet')
     def get(self, id):
-        outlet = Outlet.query.get(id)
+        serialize, options = fieldsets.sparse(Outlet, ('-cuisine', '-menu_items', '-owner'))
+        outlet = Outlet.query.options(*options).get(id)
         if not outlet:
             return {"error": "Outlet not found."}, 404
-        return outlet.to_dict(rules=('-cuisine', '-menu_items', '-owner'))
+        return serialize(outlet)
 
     def patch(self, id):
-       outlet = Outlet.query.get(id)
+       outlet = Outlet.query.options(*self.load_options).get(id)
        if not outlet:
            return {"error": "Outlet not found."}, 404
        data = request.get_json()
@@ -173,7 +265,12 @@ class OutletDetails(Resource):
        if 'owner_id' in data:
            outlet.owner_id = data['owner_id']
        db.session.commit()
-       return outlet.to_dict(rules=('-cuisine.outlets', '-menu_items.outlet', '-owner.outlets'))
+       catalog_cache.invalidate_changes('outlet', id, data, OutletLists.filters)
+       outlet = Outlet.query.options(*self.load_options).get(id)
+       return outlet.to_dict(rules=(
+           '-cuisine.outlets', '-menu_items.outlet', '-menu_items.order_items',
+           '-owner.outlets', '-owner.orders', '-owner.reservations',
+       ))
 
     def delete(self, id):
        outlet = Outlet.query.get(id)
@@ -181,13 +278,17 @@ class OutletDetails(Resource):
            return {"error": "Outlet not found."}, 404
        db.session.delete(outlet)
        db.session.commit()
+       invalidate_outlet(id)
        return {"message": "Outlet deleted successfully"}
 
 # ------------------ MENU ITEMS ------------------ #
 class MenuItemLists(Resource):
+    filters = {'outlet_id': MenuItem.outlet_id, 'category': MenuItem.category}
+
+    @catalog_cache.cached('menu_item', fields=tuple(filters))
     def get(self):
-        items = MenuItem.query.all()
-        return [item.to_dict(rules=('-outlet', '-order_items',)) for item in items]
+        serialize, options = fieldsets.sparse(MenuItem, ('-outlet', '-order_items'), keep=tuple(self.filters))
+        return paginate(MenuItem.query, MenuItem, serialize, self.filters, options=options)
 
     def post(self):
         data = request.get_json()
@@ -201,17 +302,20 @@ class MenuItemLists(Resource):
             )
             db.session.add(item)
             db.session.commit()
+            catalog_cache.invalidate('menu_item:list')
             return item.to_dict(rules=('-outlet', '-order_items')), 201
         except IntegrityError:
             db.session.rollback()
             return {"message": "Menu item already exists or invalid data"}, 400
 
 class MenuItemDetails(Resource):
+    @catalog_cache.cached('menu_item')
     def get(self, id):
-        item = MenuItem.query.get(id)
+        serialize, options = fieldsets.sparse(MenuItem, ('-outlet', '-order_items'))
+        item = MenuItem.query.options(*options).get(id)
         if not item:
             return {"error": "Menu item not found."}, 404
-        return item.to_dict(rules=('-outlet', '-order_items',))
+        return serialize(item)
     
     def patch(self, id):
         item = MenuItem.query.get(id)
@@ -228,7 +332,12 @@ class MenuItemDetails(Resource):
             item.category = data['category']
         if 'outlet_id' in data:
             item.outlet_id = data['outlet_id']
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return {"error": "That outlet already has a menu item with this name, or the data is invalid."}, 400
+        catalog_cache.invalidate_changes('menu_item', id, data, MenuItemLists.filters)
         return item.to_dict(rules=('-outlet', '-order_items',))
     
     def delete(self, id):
@@ -237,13 +346,44 @@ class MenuItemDetails(Resource):
             return {"error": "Menu item not found."}, 404
         db.session.delete(item)
         db.session.commit()
+        catalog_cache.invalidate(f'menu_item:{id}')
         return {"message": "Menu item deleted successfully"}
 
+class OutletMenuImport(Resource):
+    def post(self, id):
+        if not db.session.get(Outlet, id):
+            return {"error": "Outlet not found."}, 404
+        format = menus.FORMATS.get(request.mimetype)
+        if format is None:
+            return {"error": "Send the menu as text/csv or application/x-ndjson."}, 415
+        report, updated_ids = menus.import_menu(id, menus.parse(request.stream, format))
+        if report["created"] or report["updated"]:
+            catalog_cache.invalidate('menu_item:list', *(f'menu_item:{item_id}' for item_id in updated_ids))
+        return report, 400 if report["failed"] and not (report["created"] or report["updated"]) else 200
+
+class OutletMenuExport(Resource):
+    def get(self, id):
+        if not db.session.get(Outlet, id):
+            return {"error": "Outlet not found."}, 404
+        format = request.args.get('format') or menus.FORMATS.get(
+            request.accept_mimetypes.best_match(menus.FORMATS), 'csv')
+        if format not in menus.MEDIA_TYPES:
+            return {"error": f"'format' must be one of {', '.join(menus.MEDIA_TYPES)}."}, 400
+        return menus.export_response(id, format)
+
 # ------------------ ORDERS ------------------ #
 class OrderLists(Resource):
+    filters = {
+        'status': Order.status,
+        'user_id': Order.user_id,
+        'outlet_id': (int, lambda outlet_id: Order.order_items.any(
+            OrderItem.menu_item.has(MenuItem.outlet_id == outlet_id))),
+    }
+    date_filters = {'created': Order.created_at}
+
     def get(self):
-        orders = Order.query.all()
-        return [order.to_dict(rules=('-reservation', '-order_items','-user',)) for order in orders]
+        serialize, options = fieldsets.sparse(Order, ('-reservation', '-order_items', '-user'))
+        return paginate(Order.query, Order, serialize, self.filters, self.date_filters, options=options)
 
     def post(self):
         data = request.get_json()
@@ -254,6 +394,8 @@ class OrderLists(Resource):
                 status=data.get('status', 'pending')
             )
             db.session.add(order)
+            db.session.flush()
+            order_hub.record('created', order)
             db.session.commit()
             return order.to_dict(rules=('-reservation', '-order_items', '-user-',)), 201
         except IntegrityError:
@@ -262,10 +404,11 @@ class OrderLists(Resource):
 
 class OrderDetails(Resource):
     def get(self, id):
-        order = Order.query.get(id)
+        serialize, options = fieldsets.sparse(Order, ('-reservation', '-order_items', '-user-'))
+        order = Order.query.options(*options).get(id)
         if not order:
             return {"error": "Order not found."}, 404
-        return order.to_dict(rules=('-reservation', '-order_items','-user-',))
+        return serialize(order)
     
     def patch(self, id):
         order = Order.query.get(id)
@@ -276,6 +419,7 @@ class OrderDetails(Resource):
             order.status = data['status']
         if 'total_price' in data:
             order.total_price = data['total_price']
+        order_hub.record('updated', order)
         db.session.commit()
         return order.to_dict(rules=('-reservation', '-order_items', '-user-',))
 
@@ -283,41 +427,127 @@ class OrderDetails(Resource):
         order = Order.query.get(id)
         if not order:
             return {"error": "Order not found."}, 404
+        order_hub.record('deleted', order)
         db.session.delete(order)
         db.session.commit()
         return {"message": "Order deleted successfully"}
 
+class OrderCheckout(Resource):
+    load_options = eager(Order, 'order_items')
+
+    def post(self):
+        data = request.get_json()
+        lines = data.get('items') if isinstance(data, dict) else None
+        if 'user_id' not in (data or {}) or not isinstance(lines, list) or not lines:
+            return {"error": "A user_id and a non-empty list of items are required."}, 400
+        user_id = data['user_id']
+        if not isinstance(user_id, int) or isinstance(user_id, bool) or not 1 <= user_id <= INTEGER_MAX:
+            return {"error": "'user_id' must be a user's id."}, 400
+
+        max_quantity = current_app.config['ORDER_MAX_QUANTITY']
+        quantities = {}
+        for line in lines:
+            menu_item_id = line.get('menu_item_id') if isinstance(line, dict) else None
+            quantity = line.get('quantity', 1) if isinstance(line, dict) else None
+            # No int() coercion: it would turn a quantity of 2.9 into 2.
+            if not all(isinstance(value, int) and not isinstance(value, bool) for value in (menu_item_id, quantity)):
+                return {"error": "Each item needs a menu_item_id and an integer quantity."}, 400
+            if not 1 <= menu_item_id <= INTEGER_MAX:
+                return {"error": "Unknown menu items.", "menu_item_ids": [menu_item_id]}, 400
+            if quantity < 1:
+                return {"error": "Quantities must be at least 1."}, 400
+            quantities[menu_item_id] = quantities.get(menu_item_id, 0) + quantity
+            if quantities[menu_item_id] > max_quantity:
+                return {"error": f"At most {max_quantity} of each menu item per order.",
+                        "menu_item_id": menu_item_id}, 400
+
+        # Prices come from the menu, never from the client.
+        prices = dict(db.session.execute(
+            select(MenuItem.id, MenuItem.price).where(MenuItem.id.in_(quantities))
+        ).all())
+        missing = sorted(set(quantities) - set(prices))
+        if missing:
+            return {"error": "Unknown menu items.", "menu_item_ids": missing}, 400
+
+        rows = [
+            {"menuitem_id": menu_item_id, "quantity": quantity, "sub_total": prices[menu_item_id] * quantity}
+            for menu_item_id, quantity in quantities.items()
+        ]
+        try:
+            order = Order(
+                user_id=user_id,
+                total_price=sum(row['sub_total'] for row in rows),
+                status=data.get('status', 'pending')
+            )
+            db.session.add(order)
+            db.session.flush()
+            for row in rows:
+                row['order_id'] = order.id
+            db.session.execute(insert(OrderItem), rows)
+            # Bulk inserts bypass the flush hooks, so apply this order's rollups directly.
+            rollups.apply_delta(db.session, {}, rollups.snapshot(db.session, {order.id}))
+            order_hub.record('created', order)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return {"message": "Invalid order data"}, 400
+
+        order = Order.query.options(*self.load_options).get(order.id)
+        return order.to_dict(rules=('-reservation', '-user', '-order_items.menu_item')), 201
+
+class OrderStream(Resource):
+    # Always answers with a live feed; batch.run refuses it up front.
+    streamed = True
+
+    def get(self):
+        subscription = order_hub.subscribe(
+            user_id=request.args.get('user_id', type=int),
+            outlet_id=request.args.get('outlet_id', type=int),
+        )
+        last_event_id = request.headers.get('Last-Event-ID', type=int)
+        if last_event_id is None:
+            last_event_id = request.args.get('last_event_id', type=int)
+        backlog = order_hub.backlog(subscription, last_event_id) if last_event_id is not None else []
+        return order_hub.response(subscription, backlog)
+
 # ------------------ ORDER ITEMS ------------------ #
 class OrderItemLists(Resource):
+    filters = {'order_id': OrderItem.order_id, 'menu_item_id': OrderItem.menuitem_id}
+    load_options = eager(OrderItem, 'order', 'menu_item')
+
     def get(self):
-        order_items = OrderItem.query.all()
-        return [
-            order_item.to_dict(rules=('-order', '-menu_item')) 
-            for order_item in order_items
-        ]
+        serialize, options = fieldsets.sparse(OrderItem, ('-order', '-menu_item'))
+        return paginate(OrderItem.query, OrderItem, serialize, self.filters, options=options)
 
     def post(self):
         data = request.get_json()
         try:
             order_item = OrderItem(
                 order_id=data['order_id'],
-                menu_item_id=data['menu_item_id'],
+                menuitem_id=data['menu_item_id'],
                 quantity=data.get('quantity', 1),
-                subtotal=data.get('subtotal')
+                sub_total=data.get('subtotal')
             )
             db.session.add(order_item)
+            db.session.flush()
+            # An order's outlets come from its items; the order's own event had none of these.
+            order_hub.record_items_changed(order_item.order_id)
             db.session.commit()
-            return order_item.to_dict(rules=('-order.order_items', '-menu_item.order_items')), 201
+            order_item = OrderItem.query.options(*self.load_options).get(order_item.id)
+            return order_item.to_dict(rules=('-order.order_items', '-order.user', '-order.reservation', '-menu_item.order_items', '-menu_item.outlet')), 201
         except IntegrityError:
             db.session.rollback()
             return {"message": "Invalid order item data"}, 400
 
 class OrderItemDetails(Resource):
+    load_options = eager(OrderItem, 'order', 'menu_item')
+
     def get(self, id):
-        order_item = OrderItem.query.get(id)
+        serialize, options = fieldsets.sparse(OrderItem, ('-order', '-menu_item'))
+        order_item = OrderItem.query.options(*options).get(id)
         if not order_item:
             return {"error": "Order item not found."}, 404
-        return order_item.to_dict(rules=('-order', '-menu_item'))
+        return serialize(order_item)
 
     def patch(self, id):
         order_item = OrderItem.query.get(id)
@@ -328,51 +558,56 @@ class OrderItemDetails(Resource):
         if 'quantity' in data:
             order_item.quantity = data['quantity']
         if 'subtotal' in data:
-            order_item.subtotal = data['subtotal']
+            order_item.sub_total = data['subtotal']
         
+        order_hub.record_items_changed(order_item.order_id)
         db.session.commit()
-        return order_item.to_dict(rules=('-order.order_items', '-menu_item.order_items'))
+        order_item = OrderItem.query.options(*self.load_options).get(id)
+        return order_item.to_dict(rules=('-order.order_items', '-order.user', '-order.reservation', '-menu_item.order_items', '-menu_item.outlet'))
 
     def delete(self, id):
         order_item = OrderItem.query.get(id)
         if not order_item:
             return {"error": "Order item not found."}, 404
         
+        # Recorded first, so the outlet this item was the last one from still hears.
+        order_hub.record_items_changed(order_item.order_id)
         db.session.delete(order_item)
         db.session.commit()
         return {"message": "Order item deleted successfully"}
 
 # ------------------ TABLES ------------------ #
+TABLE_RULES = ('-outlet', '-reservations')
+
+
 class TableLists(Resource):
+    filters = {'min_capacity': (int, lambda seats: Table.capacity >= seats)}
+
     def get(self):
-        tables = Table.query.all()
-        return [
-            table.to_dict(rules=('-outlet', '-reservations')) 
-            for table in tables
-        ]
+        serialize, options = fieldsets.sparse(Table, TABLE_RULES)
+        return paginate(Table.query, Table, serialize, self.filters, options=options)
 
     def post(self):
         data = request.get_json()
         try:
             table = Table(
-                outlet_id=data['outlet_id'],
                 table_number=data['table_number'],
-                capacity=data['capacity'],
-                status=data.get('status', 'available')
+                capacity=data.get('capacity', 4),
             )
             db.session.add(table)
             db.session.commit()
-            return table.to_dict(rules=('-outlet.tables', '-reservations')), 201
-        except IntegrityError:
+            return table.to_dict(rules=TABLE_RULES), 201
+        except (IntegrityError, KeyError):
             db.session.rollback()
             return {"message": "Table creation failed"}, 400
 
 class TableDetails(Resource):
     def get(self, id):
-        table = Table.query.get(id)
+        serialize, options = fieldsets.sparse(Table, TABLE_RULES)
+        table = Table.query.options(*options).get(id)
         if not table:
             return {"error": "Table not found."}, 404
-        return table.to_dict(rules=('-outlet', '-reservations'))
+        return serialize(table)
 
     def patch(self, id):
         table = Table.query.get(id)
@@ -384,13 +619,13 @@ class TableDetails(Resource):
             table.table_number = data['table_number']
         if 'capacity' in data:
             table.capacity = data['capacity']
-        if 'status' in data:
-            table.status = data['status']
-        if 'outlet_id' in data:
-            table.outlet_id = data['outlet_id']
         
-        db.session.commit()
-        return table.to_dict(rules=('-outlet.tables', '-reservations'))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return {"error": "Table number already in use."}, 400
+        return table.to_dict(rules=TABLE_RULES)
 
     def delete(self, id):
         table = Table.query.get(id)
@@ -401,49 +636,96 @@ class TableDetails(Resource):
         db.session.commit()
         return {"message": "Table deleted successfully"}
 
-# ------------------ RESERVATIONS ------------------ #
-class ReservationLists(Resource):
+class TableAvailability(Resource):
     def get(self):
-        reservations = Reservation.query.all()
+        start, end = availability.parse_window(request.args.get('start'), request.args.get('end'))
+        party_size = availability.party_size(request.args)
         return [
-            reservation.to_dict(rules=('-user', '-table', '-order')) 
-            for reservation in reservations
+            table.to_dict(rules=TABLE_RULES)
+            for table in availability.free_tables(start, end, party_size)
         ]
 
+class TableNextSlot(Resource):
+    def get(self):
+        after, end = availability.parse_window(
+            request.args.get('after') or datetime.now().replace(microsecond=0).isoformat(), None,
+            'after', 'duration', minutes=request.args.get('duration', type=int),
+        )
+        duration = end - after
+        party_size = availability.party_size(request.args)
+
+        slot = availability.next_free_slot(party_size, after, duration)
+        if slot is None:
+            return {"error": f"No table for {party_size} frees up in the search window."}, 404
+        start, table = slot
+        return {
+            "start": start.isoformat(),
+            "end": (start + duration).isoformat(),
+            "table": table.to_dict(rules=TABLE_RULES),
+        }
+
+# ------------------ RESERVATIONS ------------------ #
+RESERVATION_RULES = ('-user.reservations', '-user.orders', '-user.outlets', '-table.reservations', '-order')
+
+
+def booking_error(error):
+    headers = {'Retry-After': '1'} if error.status == 503 else {}
+    return {"error": error.message}, error.status, headers
+
+
+class ReservationLists(Resource):
+    filters = {
+        'status': Reservation.status,
+        'user_id': Reservation.user_id,
+        'table_id': Reservation.table_id,
+        'order_id': Reservation.order_id,
+    }
+    date_filters = {'created': Reservation.created_at, 'booking': Reservation.booking_time}
+    load_options = eager(Reservation, 'user', 'table')
+
+    def get(self):
+        serialize, options = fieldsets.sparse(Reservation, ('-user', '-table', '-order'))
+        return paginate(Reservation.query, Reservation, serialize, self.filters, self.date_filters,
+                        options=options)
+
     def post(self):
         data = request.get_json()
-        try:
-            # Check table availability
-            table = Table.query.get(data['table_id'])
-            if table.status != 'available':
-                return {"error": "Table is not available for reservation"}, 400
+        start, end = availability.booking_window(data)
+        size = availability.party_size(data)
+        table_id = availability.table_id(data)
 
+        def write():
             reservation = Reservation(
-                user_id=data['user_id'],
-                table_id=data['table_id'],
-                reservation_date=data['reservation_date'],
-                reservation_time=data['reservation_time'],
+                user_id=data.get('user_id'),
+                order_id=data.get('order_id'),
+                table_id=table_id,
+                booking_time=start,
+                end_time=end,
+                no_of_people=size,
                 status=data.get('status', 'confirmed'),
-                party_size=data.get('party_size', 1)
             )
-            
-            # Update table status
-            table.status = 'reserved'
-            
             db.session.add(reservation)
-            db.session.commit()
-            
-            return reservation.to_dict(rules=('-user.reservations', '-table.reservations', '-order')), 201
+            return reservation
+
+        try:
+            reservation = availability.book(table_id, start, end, size, write)
+            reservation = Reservation.query.options(*self.load_options).get(reservation.id)
+            return reservation.to_dict(rules=RESERVATION_RULES), 201
+        except availability.BookingError as error:
+            return booking_error(error)
         except IntegrityError:
             db.session.rollback()
             return {"message": "Reservation creation failed"}, 400
 
 class ReservationDetails(Resource):
+    load_options = eager(Reservation, 'user', 'table')
+
     def get(self, id):
-        reservation = Reservation.query.get(id)
+        serialize, options = fieldsets.sparse(Reservation, ('-user', '-table', '-order'))
+        reservation = Reservation.query.options(*options).get(id)
         if not reservation:
             return {"error": "Reservation not found."}, 404
-        return reservation.to_dict(rules=('-user', '-table', '-order'))
+        return serialize(reservation)
 
     def patch(self, id):
         reservation = Reservation.query.get(id)
@@ -451,48 +733,105 @@ class ReservationDetails(Resource):
             return {"error": "Reservation not found."}, 404
         
         data = request.get_json()
-        
-        # Check if changing table
-        if 'table_id' in data:
-            # Release old table
-            if reservation.table:
-                reservation.table.status = 'available'
-            
-            # Assign new table
-            new_table = Table.query.get(data['table_id'])
-            if new_table.status != 'available':
-                return {"error": "New table is not available"}, 400
-            
-            new_table.status = 'reserved'
-            reservation.table_id = data['table_id']
-        
-        # Update other fields
-        if 'reservation_date' in data:
-            reservation.reservation_date = data['reservation_date']
-        if 'reservation_time' in data:
-            reservation.reservation_time = data['reservation_time']
-        if 'status' in data:
-            reservation.status = data['status']
-        if 'party_size' in data:
-            reservation.party_size = data['party_size']
-        
-        db.session.commit()
-        return reservation.to_dict(rules=('-user.reservations', '-table.reservations', '-order'))
+        start, end = availability.booking_window(data, reservation)
+        size = availability.party_size(data, reservation.no_of_people or 1)
+        table_id = availability.table_id(data) if 'table_id' in data else reservation.table_id
+        status = data.get('status', reservation.status)
+
+        def write():
+            current = Reservation.query.get(id)
+            current.table_id = table_id
+            current.booking_time = start
+            current.end_time = end
+            current.no_of_people = size
+            current.status = status
+            return current
+
+        # Re-check only when the change could collide with another booking.
+        moved = (table_id, start, end, size) != (reservation.table_id, reservation.booking_time,
+                                                  reservation.end_time, reservation.no_of_people)
+        if (moved or 'status' in data) and (status or '').lower() not in availability.RELEASED_STATUSES:
+            try:
+                availability.book(table_id, start, end, size, write, reservation_id=id)
+            except availability.BookingError as error:
+                return booking_error(error)
+        else:
+            write()
+            db.session.commit()
+        reservation = Reservation.query.options(*self.load_options).get(id)
+        return reservation.to_dict(rules=RESERVATION_RULES)
 
     def delete(self, id):
         reservation = Reservation.query.get(id)
         if not reservation:
             return {"error": "Reservation not found."}, 404
         
-        # Release the table
-        if reservation.table:
-            reservation.table.status = 'available'
-        
         db.session.delete(reservation)
         db.session.commit()
         return {"message": "Reservation deleted successfully"}
 
+# ------------------ SEARCH ------------------ #
+class Search(Resource):
+    serializers = {
+        'outlets': lambda outlet: outlet.to_dict(rules=('-menu_items', '-owner', '-cuisine')),
+        'menu_items': lambda menu_item: menu_item.to_dict(rules=('-outlet', '-order_items')),
+    }
+
+    def get(self):
+        q = request.args.get('q', '')
+        if not search.terms(q):
+            return {"error": "'q' must contain at least one word."}, 400
+        kinds = request.args.get('type')
+        kinds = kinds.split(',') if kinds else list(search.INDEXES)
+        unknown = [kind for kind in kinds if kind not in search.INDEXES]
+        if unknown:
+            return {"error": f"'type' must be one of {', '.join(search.INDEXES)}."}, 400
+        limit = request.args.get('limit', 20, type=int)
+        if limit < 1:
+            return {"error": "'limit' must be a positive integer."}, 400
+
+        results = search.search(db.session, q, kinds, limit)
+        return {kind: [self.serializers[kind](row) for row in rows] for kind, rows in results.items()}
+
+# ------------------ ANALYTICS ------------------ #
+class AnalyticsSummary(Resource):
+    def get(self):
+        day = request.args.get('date')
+        if day is not None:
+            try:
+                day = date.fromisoformat(day)
+            except ValueError:
+                abort(400, error="'date' must be formatted as YYYY-MM-DD.")
+        return analytics.summary(
+            owner_id=request.args.get('owner_id', type=int),
+            outlet_id=request.args.get('outlet_id', type=int),
+            day=day,
+        )
+
+# ------------------ CACHE ------------------ #
+class CacheStats(Resource):
+    def get(self):
+        return catalog_cache.stats()
+
+# ------------------ METRICS ------------------ #
+class Metrics(Resource):
+    def get(self):
+        return Response(request_metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+class SlowRequests(Resource):
+    def get(self):
+        if request_metrics.slow_threshold is None:
+            return {"error": "The slow-request log is off; set SLOW_REQUEST_THRESHOLD to enable it."}, 404
+        return request_metrics.slow_requests()
+
+# ------------------ BATCH ------------------ #
+class Batch(Resource):
+    def post(self):
+        return {"responses": batch.dispatch(request.get_json(silent=True))}
+
 # ------------------ ROUTES ------------------ #
+representations.init_api(api)
+
 api.add_resource(Register, '/register')
 api.add_resource(Login, '/login')
 api.add_resource(Logout, '/logout')
@@ -500,6 +839,7 @@ api.add_resource(CheckAuth, '/check-auth')
 
 api.add_resource(UserLists, '/users')
 api.add_resource(UserDetails, '/users/<int:id>')
+api.add_resource(UserBulkCreate, '/users/bulk')
 
 api.add_resource(CuisineList, '/cuisines')
 api.add_resource(CuisineDetails, '/cuisines/<int:id>')
@@ -509,18 +849,78 @@ api.add_resource(OutletDetails, '/outlets/<int:id>')
 
 api.add_resource(MenuItemLists, '/menu-items')
 api.add_resource(MenuItemDetails, '/menu-items/<int:id>')
+api.add_resource(OutletMenuImport, '/outlets/<int:id>/menu/import')
+api.add_resource(OutletMenuExport, '/outlets/<int:id>/menu/export')
 
 api.add_resource(OrderLists, '/orders')
 api.add_resource(OrderDetails, '/orders/<int:id>')
+api.add_resource(OrderCheckout, '/orders/checkout')
+api.add_resource(OrderStream, '/orders/stream')
 
 api.add_resource(OrderItemLists, '/order-items')
 api.add_resource(OrderItemDetails, '/order-items/<int:id>')
 
 api.add_resource(TableLists, '/tables')
 api.add_resource(TableDetails, '/tables/<int:id>')
+api.add_resource(TableAvailability, '/tables/available')
+api.add_resource(TableNextSlot, '/tables/next-slot')
 
 api.add_resource(ReservationLists, '/reservations')
 api.add_resource(ReservationDetails, '/reservations/<int:id>')
 
+api.add_resource(Search, '/search')
+api.add_resource(AnalyticsSummary, '/analytics/summary')
+api.add_resource(CacheStats, '/cache/stats')
+api.add_resource(Metrics, '/metrics')
+api.add_resource(SlowRequests, '/metrics/slow')
+api.add_resource(Batch, '/batch')
+
+
+# ------------------ APP FACTORY ------------------ #
+def create_app(config=None):
+    """Build an application instance.
+
+    `config` is a config class, object or import path (default `Config`),
+    or a dict of overrides on top of `Config`. Routes and extensions are
+    bound per instance, so tests can build as many isolated apps as they
+    like: with `TestConfig` each gets its own in-memory database. The
+    `flask` CLI finds this factory on its own (`FLASK_APP=app`).
+    """
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+    app.config.setdefault('SQLITE_PRAGMAS', sqlite_pragmas())
+
+    db.init_app(app)
+    with app.app_context():
+        init_sqlite(db.engine, app.config['SQLITE_PRAGMAS'])
+    bcrypt.init_app(app)
+    jwt.init_app(app)
+    cors.init_app(app)
+    api.init_app(app)
+    app.add_url_rule('/', 'home', home)
+
+    init_query_debug(app)
+    request_metrics.init_app(app)
+    catalog_cache.init_app(app)
+    revocations.init_app(app)
+    hasher.init_app(app)
+    order_hub.init_app(app)
+
+    app.cli.add_command(rollups.rollups_cli)
+    app.cli.add_command(search.search_cli)
+    app.cli.add_command(datagen.datagen_cli)
+    # Flask-Migrate imports alembic (~150 ms) and only adds `flask db`, so it
+    # is set up only when the `flask` command is loading the app.
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    return app
+
+
 if __name__ == '__main__':
-    app.run(port=5555, debug=True)
\ No newline at end of file
+    create_app().run(port=5555, debug=True)
\ No newline at end of file
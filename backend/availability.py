@@ -0,0 +1,253 @@
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from flask_restful import abort
+from sqlalchemy import DateTime, and_, exists, func, literal, or_, select, union, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+from config import db
+from models import INTEGER_MAX, Table, Reservation
+from pagination import parse_datetime
+
+# Reservations in these states no longer hold their table.
+RELEASED_STATUSES = ('cancelled',)
+
+
+class BookingError(Exception):
+    """A booking that cannot be made, with the HTTP status to answer."""
+
+    def __init__(self, message, status=409):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class add_minutes(FunctionElement):
+    """`timestamp + N minutes`, rendered for the connected dialect."""
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(add_minutes)
+def _add_minutes_default(element, compiler, **kw):
+    column, minutes = list(element.clauses)
+    return f"({compiler.process(column, **kw)} + INTERVAL '{int(minutes.value)} minutes')"
+
+
+@compiles(add_minutes, 'sqlite')
+def _add_minutes_sqlite(element, compiler, **kw):
+    column, minutes = list(element.clauses)
+    # Same text layout SQLAlchemy stores SQLite DateTimes in, so results compare as strings.
+    return f"strftime('%Y-%m-%d %H:%M:%f000', {compiler.process(column, **kw)}, '{int(minutes.value):+d} minutes')"
+
+
+def default_duration():
+    return timedelta(minutes=current_app.config.get('RESERVATION_DURATION', 90))
+
+
+def max_duration():
+    return timedelta(minutes=current_app.config.get('RESERVATION_MAX_DURATION', 240))
+
+
+def holds_table():
+    return or_(Reservation.status.is_(None), func.lower(Reservation.status).notin_(RELEASED_STATUSES))
+
+
+def overlapping(start, end, table_id=Reservation.table_id, exclude_id=None):
+    """Criteria for active reservations of `table_id` that intersect `[start, end)`.
+
+    `booking_time` is bounded on both sides (no reservation is longer than
+    RESERVATION_MAX_DURATION), so the overlap test is a range scan on the
+    (table_id, booking_time) index rather than a scan of the table's history.
+    """
+    if isinstance(start, datetime):
+        lower = start - max_duration()
+    else:
+        lower = add_minutes(start, -int(max_duration().total_seconds() // 60))
+    criteria = [
+        Reservation.table_id == table_id,
+        Reservation.booking_time < end,
+        Reservation.booking_time > lower,
+        Reservation.end_time > start,
+        holds_table(),
+    ]
+    if exclude_id is not None:
+        criteria.append(Reservation.id != exclude_id)
+    return and_(*criteria)
+
+
+def is_free(table_id, start, end, exclude_id=None):
+    """True when no active reservation holds `table_id` during `[start, end)`."""
+    clash = select(Reservation.id).where(overlapping(start, end, table_id, exclude_id)).limit(1)
+    return db.session.execute(clash).first() is None
+
+
+def free_tables(start, end, party_size=1):
+    """Query for tables seating `party_size` that are free for all of `[start, end)`."""
+    return Table.query.filter(
+        Table.capacity >= party_size,
+        ~exists().where(overlapping(start, end, Table.id)),
+    ).order_by(Table.capacity, Table.table_number)
+
+
+def book(table_id, start, end, party_size, write, reservation_id=None):
+    """Commit the reservation changes staged by `write()` only if the slot is still free.
+
+    The table's `booking_version` is read before the overlap check and the
+    commit bumps it with `UPDATE ... WHERE booking_version = <read>`. If
+    another booking for the table committed in between, that update
+    matches no row and the attempt is rolled back and retried against the
+    fresh state. This holds on SQLite and on PostgreSQL's default isolation
+    level without table locks. After RESERVATION_BOOKING_ATTEMPTS lost races
+    a 503 BookingError is raised. `write` runs once per attempt, because a
+    rollback discards what it staged. Returns what the successful call
+    returned.
+    """
+    if table_id is None:
+        raise BookingError("'table_id' is required.", 400)
+    attempts = current_app.config.get('RESERVATION_BOOKING_ATTEMPTS', 5)
+    for attempt in range(attempts):
+        try:
+            table = db.session.get(Table, table_id, populate_existing=True)
+            if table is None:
+                raise BookingError("Table not found.", 404)
+            if party_size > table.capacity:
+                raise BookingError(f"Table {table.table_number} seats at most {table.capacity}.", 400)
+            version = table.booking_version
+            if not is_free(table_id, start, end, exclude_id=reservation_id):
+                raise BookingError("Table is already booked for that time.")
+
+            result = write()
+            db.session.flush()
+            claimed = db.session.execute(
+                update(Table)
+                .where(Table.id == table_id, Table.booking_version == version)
+                .values(booking_version=version + 1)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if claimed:
+                db.session.commit()
+                return result
+        except BookingError:
+            db.session.rollback()
+            raise
+        except OperationalError:
+            # SQLite reports a lost write race as "database is locked".
+            pass
+        db.session.rollback()
+        time.sleep(random.uniform(0, 0.005 * 2 ** attempt))
+    raise BookingError("Table is busy, please retry.", 503)
+
+
+def next_free_slot(party_size, after, duration=None, horizon=None):
+    """Earliest `(start, table)` at or after `after` with a big enough free table.
+
+    A table can only become free when a reservation on it ends, so the
+    candidate starts are `after` itself and the end times of active
+    reservations in the horizon. The database picks the first candidate
+    where some table has no overlap, so nothing is loaded into Python but
+    the answer. Returns None when nothing frees up within `horizon`.
+    """
+    duration = duration or default_duration()
+    horizon = horizon or timedelta(days=current_app.config.get('RESERVATION_SEARCH_DAYS', 14))
+    minutes = int(duration.total_seconds() // 60)
+
+    candidates = union(
+        select(literal(after, DateTime()).label('start')),
+        select(Reservation.end_time.label('start'))
+        .join(Table, Table.id == Reservation.table_id)
+        .where(
+            Table.capacity >= party_size,
+            Reservation.end_time > after,
+            Reservation.end_time < after + horizon,
+            holds_table(),
+        ),
+    ).cte('candidates')
+
+    slot = db.session.execute(
+        select(candidates.c.start, Table.id)
+        .join(Table, Table.capacity >= party_size)
+        .where(~exists().where(overlapping(candidates.c.start, add_minutes(candidates.c.start, minutes), Table.id)))
+        .order_by(candidates.c.start, Table.capacity, Table.table_number)
+        .limit(1)
+    ).first()
+    if slot is None:
+        return None
+
+    start = slot[0]
+    if isinstance(start, str):
+        # SQLite hands back the raw text of a UNIONed column.
+        start = datetime.fromisoformat(start)
+    return start, db.session.get(Table, slot[1])
+
+
+def _naive(value):
+    # Booking times are stored as naive local times.
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+
+def parse_window(start, end=None, start_name='start', end_name='end', minutes=None):
+    """Parse an ISO `[start, end)` window.
+
+    Without `end` the window lasts `minutes`, or the standard duration.
+    """
+    if not start:
+        abort(400, error=f"'{start_name}' is required.")
+    start = _naive(parse_datetime(start_name, start))
+    if end:
+        end = _naive(parse_datetime(end_name, end))
+    elif minutes is not None and not 0 < minutes <= max_duration().total_seconds() // 60:
+        abort(400, error=f"'{end_name}' must be from 1 to {int(max_duration().total_seconds() // 60)} minutes.")
+    else:
+        end = start + (default_duration() if minutes is None else timedelta(minutes=minutes))
+    if end <= start:
+        abort(400, error=f"'{end_name}' must be after '{start_name}'.")
+    if end - start > max_duration():
+        abort(400, error=f"A booking can last at most {int(max_duration().total_seconds() // 60)} minutes.")
+    return start, end
+
+
+def _positive_int(name, value, maximum=INTEGER_MAX):
+    if isinstance(value, str) and re.fullmatch(r'[0-9]+', value.strip()):
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool) or not 1 <= value <= maximum:
+        abort(400, error=f"'{name}' must be a whole number from 1 to {maximum}.")
+    return value
+
+
+def party_size(data, default=1):
+    """The party size a reservation payload or query string asks for, as `no_of_people` or `party_size`."""
+    maximum = current_app.config.get('RESERVATION_MAX_PARTY_SIZE', 100)
+    if 'no_of_people' in data:
+        return _positive_int('no_of_people', data['no_of_people'], maximum)
+    return _positive_int('party_size', data.get('party_size', default), maximum)
+
+
+def table_id(data):
+    """The table a reservation payload books."""
+    value = data.get('table_id')
+    if value is None:
+        abort(400, error="'table_id' is required.")
+    return _positive_int('table_id', value)
+
+
+def booking_window(data, reservation=None):
+    """The window a reservation payload asks for, falling back to `reservation`'s.
+
+    Accepts `booking_time`/`end_time` or the dashboard's separate
+    `reservation_date` and `reservation_time` fields.
+    """
+    start = data.get('booking_time')
+    if start is None and data.get('reservation_date'):
+        start = f"{data['reservation_date']}T{data.get('reservation_time') or '00:00'}"
+    end = data.get('end_time')
+    if reservation is not None and start is None:
+        start = reservation.booking_time.isoformat()
+        if end is None:
+            end = reservation.end_time.isoformat()
+    return parse_window(start, end, 'booking_time', 'end_time')
@@ -0,0 +1,88 @@
+import logging
+
+from flask import current_app, request
+from flask_restful import abort
+
+from config import api, db
+import representations
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+# Headers of the batch request every sub-request is sent with, unless it sets its own.
+INHERITED_HEADERS = ('Authorization', 'Cookie', 'User-Agent')
+
+
+def parse(data, max_requests):
+    """The sub-requests of a batch body: `{"requests": [...]}` or the bare list.
+
+    Only the batch's shape is checked up front; each sub-request's own
+    problems are answered in its slot of the results.
+    """
+    requests = data.get('requests') if isinstance(data, dict) else data
+    if not isinstance(requests, list) or not requests:
+        abort(400, error="Expected a non-empty list of requests.")
+    if len(requests) > max_requests:
+        abort(400, error=f"A batch holds at most {max_requests} requests; got {len(requests)}.")
+    return requests
+
+
+def _error(status, message):
+    return {"status": status, "body": {"error": message}}
+
+
+def run(item, inherited, batch_endpoint):
+    """Dispatch one sub-request `{"method", "path", "body", "headers"}` and return `{"status", "body"}`.
+
+    It goes through the app's whole request handling (hooks, JWT checks,
+    error handlers, the response cache) in a request context nested in
+    the batch's, so it shares the batch's app context and DB session.
+    """
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str) or not item['path'].startswith('/'):
+        return _error(400, "Each request needs a 'path' starting with '/'.")
+    if not isinstance(item.get('headers', {}), dict):
+        return _error(400, "'headers' must be an object.")
+    method = str(item.get('method', 'GET')).upper()
+    if method not in METHODS:
+        return _error(405, f"'method' must be one of {', '.join(METHODS)}.")
+    headers = dict(inherited, **(item.get('headers') or {}))
+    # Sub-responses are embedded in the batch's body, which picks the wire format.
+    headers['Accept'] = representations.JSON
+
+    app = current_app._get_current_object()
+    options = {'json': item['body']} if 'body' in item else {}
+    with app.test_request_context(item['path'], method=method, headers=headers,
+                                  base_url=request.host_url, **options):
+        if request.routing_exception is not None:
+            return _error(request.routing_exception.code, request.routing_exception.description)
+        if request.endpoint not in api.endpoints or request.endpoint == batch_endpoint:
+            return _error(400, "Only API resources can be batched.")
+        # Refused before dispatch: a live feed subscribes (and starts its poller) in the handler.
+        if getattr(app.view_functions[request.endpoint].view_class, 'streamed', False):
+            return _error(400, "Streamed responses can't be batched.")
+        try:
+            response = app.full_dispatch_request()
+        except Exception:
+            db.session.rollback()
+            logger.exception('Batched %s %s failed', method, item['path'])
+            return _error(500, "Internal server error.")
+        if response.status_code >= 500:
+            db.session.rollback()
+        if response.is_streamed:
+            # Never iterated, so a streamed list never runs its query.
+            response.close()
+            return _error(400, "Streamed responses can't be batched.")
+        body = response.get_json(silent=True) if response.is_json else response.get_data(as_text=True)
+        return {"status": response.status_code, "body": body}
+
+
+def dispatch(data):
+    """Run every sub-request of the batch body `data` in order and return their results.
+
+    One HTTP round trip, CORS check and app context serve them all. Each
+    sub-request is authenticated on its own from the batch's inherited
+    headers, and one failing does not stop the rest.
+    """
+    requests = parse(data, current_app.config['BATCH_MAX_REQUESTS'])
+    inherited = {name: request.headers[name] for name in INHERITED_HEADERS if name in request.headers}
+    return [run(item, inherited, request.endpoint) for item in requests]
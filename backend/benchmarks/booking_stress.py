@@ -0,0 +1,100 @@
+"""Concurrent booking stress test: hammer a few tables and prove nothing is double-booked.
+
+Run from backend/:  python -m benchmarks.booking_stress [--threads 32] [--requests 400]
+
+Scratch tables (numbered from 900000) are created in the configured
+database. Every thread then POSTs /reservations through its own test
+client for random, heavily overlapping slots on those tables. Afterwards
+the active reservations are self-joined to look for overlaps, and the
+scratch tables and their reservations are deleted. Exits non-zero if any
+table was double-booked.
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import aliased
+
+from app import create_app
+from config import db
+from models import Table, Reservation
+import availability
+
+FIRST_TABLE_NUMBER = 900000
+
+
+def double_bookings(table_ids):
+    first, second = aliased(Reservation), aliased(Reservation)
+    return db.session.execute(
+        select(func.count()).select_from(first).join(second, and_(
+            first.table_id == second.table_id,
+            first.id < second.id,
+            first.booking_time < second.end_time,
+            second.booking_time < first.end_time,
+        )).where(first.table_id.in_(table_ids))
+    ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=400, help='in total')
+    parser.add_argument('--tables', type=int, default=3)
+    parser.add_argument('--slots', type=int, default=8, help='30-minute start times to choose from')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    app = create_app()
+
+    day = datetime(2099, 1, 1, 18, 0)
+    with app.app_context():
+        tables = [Table(table_number=FIRST_TABLE_NUMBER + i, capacity=4) for i in range(args.tables)]
+        db.session.add_all(tables)
+        db.session.commit()
+        table_ids = [table.id for table in tables]
+
+    rng = random.Random(args.seed)
+    jobs = [
+        {'table_id': rng.choice(table_ids), 'party_size': 2,
+         'booking_time': (day + timedelta(minutes=30 * rng.randrange(args.slots))).isoformat()}
+        for _ in range(args.requests)
+    ]
+    statuses = Counter()
+    lock = threading.Lock()
+    start_line = threading.Barrier(args.threads)
+
+    def worker(index):
+        client = app.test_client()
+        start_line.wait()
+        for job in jobs[index::args.threads]:
+            status = client.post('/reservations', json=job).status_code
+            with lock:
+                statuses[status] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        overlaps = double_bookings(table_ids)
+        booked = Reservation.query.filter(Reservation.table_id.in_(table_ids), availability.holds_table()).count()
+        for table in Table.query.filter(Table.id.in_(table_ids)):
+            db.session.delete(table)
+        db.session.commit()
+
+    print(f'{args.requests} requests on {args.threads} threads in {elapsed:.1f}s')
+    print('status codes: ' + ', '.join(f'{code}={count}' for code, count in sorted(statuses.items())))
+    print(f'bookings kept: {booked}   double bookings: {overlaps}')
+    sys.exit(1 if overlaps else 0)
+
+
+if __name__ == '__main__':
+    main()
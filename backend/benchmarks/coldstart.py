@@ -0,0 +1,115 @@
+"""Cold-start cost of a process, a gunicorn worker and a test app instance.
+
+Run from backend/:  python -m benchmarks.coldstart [--runs 5] [--workers 4] [--apps 200]
+
+Fresh interpreters time `import app`, `create_app()` and the first two
+requests, once as a server or test loads the app and once inside a click
+context, as the `flask` command does (which adds Flask-Migrate). gunicorn is then started with
+and without `--preload` and each worker's "cold start" log line (fork to
+ready, see gunicorn.conf.py) is collected. Finally `--apps` TestConfig apps
+are built and given a schema in this process, which is what a test suite
+pays per fixture.
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+import click
+{preamble}
+import app as module
+imported = time.perf_counter()
+app = module.create_app()
+created = time.perf_counter()
+client = app.test_client()
+client.get('/cuisines')
+first = time.perf_counter()
+client.get('/cuisines')
+second = time.perf_counter()
+print(json.dumps({{'import': imported - started, 'create_app': created - imported,
+                  'first request': first - created, 'second request': second - first}}))
+"""
+
+COLD_START = re.compile(r'Worker (\d+) cold start (\d+) ms')
+PRELOADED = re.compile(r'App preloaded in (\d+) ms')
+
+
+def interpreter(preamble, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', CHILD.format(preamble=preamble)],
+                                check=True, capture_output=True, text=True).stdout
+        samples.append(json.loads(output.splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) * 1000 for key in samples[0]}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def gunicorn(workers, preload, timeout=60):
+    env = dict(os.environ, GUNICORN_PRELOAD='1' if preload else '0', WEB_CONCURRENCY=str(workers),
+               GUNICORN_BIND=f'127.0.0.1:{free_port()}')
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'wsgi:app'], env=env,
+                               stderr=subprocess.PIPE, text=True)
+    cold_starts, preloaded = [], None
+    deadline = time.monotonic() + timeout
+    try:
+        for line in process.stderr:
+            if match := PRELOADED.search(line):
+                preloaded = int(match.group(1))
+            if match := COLD_START.search(line):
+                cold_starts.append(int(match.group(2)))
+            if len(cold_starts) == workers or time.monotonic() > deadline:
+                break
+    finally:
+        process.terminate()
+        process.wait()
+    return preloaded, cold_starts
+
+
+def test_apps(count):
+    from app import create_app
+    from config import TestConfig, db
+
+    started = time.perf_counter()
+    for _ in range(count):
+        app = create_app(TestConfig)
+        with app.app_context():
+            db.create_all()
+    return (time.perf_counter() - started) / count * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per config')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--apps', type=int, default=200)
+    args = parser.parse_args()
+
+    for label, preamble in (('server', ''), ('flask command', 'click.Context(click.Command("flask")).__enter__()')):
+        timings = interpreter(preamble, args.runs)
+        print(f'{label:<24} ' + '   '.join(f'{key} {ms:.0f} ms' for key, ms in timings.items()))
+
+    for preload in (False, True):
+        preloaded, cold_starts = gunicorn(args.workers, preload)
+        label = 'gunicorn --preload' if preload else 'gunicorn'
+        master = f'   app preloaded in {preloaded} ms' if preloaded is not None else ''
+        print(f'{label:<24} worker cold start median {statistics.median(cold_starts):.0f} ms '
+              f'(max {max(cold_starts)} ms over {len(cold_starts)} workers){master}')
+
+    print(f'{"TestConfig app + schema":<24} {test_apps(args.apps):.1f} ms each over {args.apps} apps')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Encode time and payload size per response format on the /orders and /menu-items lists.
+
+Run from backend/:  python -m benchmarks.encoders [--orders 20000] [--menu-items 5000]
+
+A throwaway SQLite database is filled by `datagen.generate`, and each
+list's full (unpaged) body is fetched once through the test client and
+decoded. That data is then encoded `--repeat` times by each format: the
+stdlib `json.dumps` flask_restful used before (and its debug-mode indent=4),
+the compact and `?pretty` ujson encoders, and MessagePack when it is
+installed. Every encoding is decoded and compared with the input first.
+Finally whole requests are timed per Accept header.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from app import create_app
+from config import db
+import datagen
+import representations
+
+LISTS = ('/orders', '/menu-items')
+
+
+def encoders():
+    formats = {
+        'stdlib json (before)': (lambda data: json.dumps(data) + '\n', json.loads),
+        'stdlib json indent=4': (lambda data: json.dumps(data, indent=4) + '\n', json.loads),
+        'ujson compact': (representations.dumps, json.loads),
+        'ujson ?pretty': (lambda data: representations.dumps(data, pretty=True), json.loads),
+    }
+    if representations.msgpack is not None:
+        msgpack = representations.msgpack
+        formats['msgpack'] = (
+            lambda data: msgpack.packb(data, default=representations.default, use_bin_type=True),
+            lambda body: msgpack.unpackb(body, raw=False),
+        )
+    return formats
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--menu-items', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), 'encoders.db')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database}', 'BCRYPT_LOG_ROUNDS': 4})
+    try:
+        with app.app_context():
+            db.create_all()
+            with db.engine.connect() as conn:
+                datagen.generate(conn, users=2000, outlets=50, menu_items=args.menu_items, tables=10,
+                                 orders=args.orders, reservations=0, seed=args.seed)
+        client = app.test_client()
+        if representations.msgpack is None:
+            print('msgpack is not installed; skipping MessagePack.\n')
+
+        print(f'{"list":<12} {"format":<22} {"encode ms":>10} {"KB":>9} {"vs before":>10}')
+        for resource in LISTS:
+            data = client.get(resource).get_json()
+            before = None
+            for name, (encode, decode) in encoders().items():
+                body = encode(data)
+                assert decode(body) == data, name
+                seconds = timed(lambda: encode(data), args.repeat)
+                size = len(body.encode('utf-8') if isinstance(body, str) else body)
+                before = before or size
+                print(f'{resource:<12} {name:<22} {seconds * 1000:>10.2f} {size / 1024:>9.1f} '
+                      f'{size / before * 100 - 100:>+9.0f}%')
+            print(f'{"":<12} ({len(data)} rows)')
+
+        print(f'\n{"request":<40} {"ms":>8} {"KB":>9}')
+        accepts = [('application/json', ''), ('application/json', '?pretty')]
+        if representations.msgpack is not None:
+            accepts.append((representations.MSGPACK, ''))
+        for resource in LISTS:
+            for accept, query in accepts:
+                url = resource + query
+                response = client.get(url, headers={'Accept': accept})
+                seconds = timed(lambda: client.get(url, headers={'Accept': accept}), max(3, args.repeat // 2))
+                print(f'{f"GET {url} ({accept})":<40} {seconds * 1000:>8.1f} {len(response.get_data()) / 1024:>9.1f}')
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        os.remove(database)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Query plans and timings for the hot queries before and after the FK/filter indexes.
+
+Run from backend/:  python -m benchmarks.indexes [--orders 200000] [--keep path.db]
+
+A throwaway SQLite database is created from the models, the indexes added
+in migration 3db7413d9202 are dropped, and it is seeded with synthetic
+rows. Each query is then EXPLAINed and timed, the indexes are created and
+ANALYZEd, and the same queries are run again.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+
+from config import db
+from models import User, Cuisine, Outlet, MenuItem, Table, Order, OrderItem, Reservation
+
+INDEXES = [
+    'ix_orders_user_id',
+    'ix_orders_status_created_at',
+    'ix_order_items_order_id',
+    'ix_order_items_menuitem_id',
+    'ix_menu_items_outlet_id',
+    'ix_outlets_cuisine_id',
+    'ix_outlets_owner_id',
+    'ix_reservations_user_id',
+    'ix_reservations_order_id',
+    'ix_reservations_booking_time',
+    'ix_reservations_table_id_booking_time',
+]
+
+START = datetime(2025, 1, 1)
+STATUSES = ['pending', 'preparing', 'delivered', 'completed', 'cancelled']
+
+# (label, SQL, params) as issued by the list filters, loaders and analytics.
+QUERIES = [
+    ('orders by user', 'SELECT * FROM orders WHERE user_id = ? ORDER BY id', (42,)),
+    ('orders by status+created', "SELECT * FROM orders WHERE status = ? AND created_at >= ? AND created_at < ? "
+     "ORDER BY id", ('pending', '2025-03-01', '2025-03-08')),
+    ('order_items of orders', 'SELECT * FROM order_items WHERE order_id IN (?, ?, ?, ?, ?)', (10, 20, 30, 40, 50)),
+    ('order_items of dish', 'SELECT * FROM order_items WHERE menuitem_id = ?', (7,)),
+    ('menu of outlet', 'SELECT * FROM menu_items WHERE outlet_id = ? ORDER BY id', (3,)),
+    ('outlets by cuisine', 'SELECT * FROM outlets WHERE cuisine_id = ? ORDER BY id', (2,)),
+    ('owner orders (analytics)', 'SELECT count(DISTINCT order_items.order_id) FROM order_items '
+     'JOIN menu_items ON menu_items.id = order_items.menuitem_id '
+     'JOIN outlets ON outlets.id = menu_items.outlet_id WHERE outlets.owner_id = ?', (5,)),
+    ('table bookings in window', 'SELECT * FROM reservations WHERE table_id = ? AND booking_time >= ? '
+     'AND booking_time < ?', (9, '2025-02-01', '2025-02-02')),
+    ('bookings in range', 'SELECT * FROM reservations WHERE booking_time >= ? AND booking_time < ? '
+     'ORDER BY id', ('2025-02-01 18:00', '2025-02-01 19:00')),
+]
+
+
+def seed(engine, args):
+    rng = random.Random(args.seed)
+    owners = max(1, args.outlets // 2)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {'name': f'user{i}', 'email': f'user{i}@example.com', '_password_hash': 'x',
+             'role': 'outlet owner' if i <= owners else 'customer'}
+            for i in range(1, args.users + 1)
+        ])
+        conn.execute(insert(Cuisine), [{'name': f'Cuisine {i}'} for i in range(1, 21)])
+        conn.execute(insert(Outlet), [
+            {'name': f'Outlet {i}', 'cuisine_id': rng.randint(1, 20), 'owner_id': rng.randint(1, owners)}
+            for i in range(1, args.outlets + 1)
+        ])
+        items = args.outlets * args.menu_items
+        prices = {i: rng.randint(200, 2000) for i in range(1, items + 1)}
+        conn.execute(insert(MenuItem), [
+            {'name': f'Dish {i}', 'price': prices[i], 'category': 'Main',
+             'outlet_id': (i - 1) // args.menu_items + 1}
+            for i in range(1, items + 1)
+        ])
+        conn.execute(insert(Table), [{'table_number': i, 'capacity': rng.choice((2, 4, 6, 8))} for i in range(1, args.tables + 1)])
+
+        span = 365 * 24 * 3600
+        batch = 20000
+        for first in range(1, args.orders + 1, batch):
+            orders, lines = [], []
+            for order_id in range(first, min(first + batch, args.orders + 1)):
+                orders.append({'id': order_id, 'status': rng.choice(STATUSES), 'total_price': 0,
+                               'user_id': rng.randint(1, args.users),
+                               'created_at': START + timedelta(seconds=rng.randrange(span))})
+                for _ in range(rng.randint(1, 5)):
+                    item = rng.randint(1, items)
+                    quantity = rng.randint(1, 3)
+                    lines.append({'order_id': order_id, 'menuitem_id': item, 'quantity': quantity,
+                                  'sub_total': prices[item] * quantity})
+            conn.execute(insert(Order), orders)
+            conn.execute(insert(OrderItem), lines)
+
+        conn.execute(insert(Reservation), [
+            {'user_id': rng.randint(1, args.users), 'table_id': rng.randint(1, args.tables),
+             'booking_time': START + timedelta(minutes=30 * rng.randrange(span // 1800)),
+             'no_of_people': rng.randint(1, 8), 'status': 'confirmed'}
+            for _ in range(args.reservations)
+        ])
+
+
+def run(conn, repeat):
+    results = {}
+    for label, sql, params in QUERIES:
+        plan = [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', params)]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.exec_driver_sql(sql, params).fetchall()
+        results[label] = (plan, (time.perf_counter() - start) / repeat * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--outlets', type=int, default=300)
+    parser.add_argument('--menu-items', type=int, default=40, help='per outlet')
+    parser.add_argument('--tables', type=int, default=100)
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--reservations', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep', help='write the database here instead of a temp file')
+    args = parser.parse_args()
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(), 'indexes.db')
+    engine = create_engine(f'sqlite:///{path}')
+    try:
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            for name in INDEXES:
+                conn.exec_driver_sql(f'DROP INDEX {name}')
+
+        start = time.perf_counter()
+        seed(engine, args)
+        print(f'seeded {args.orders:,} orders in {time.perf_counter() - start:.1f}s -> {path}\n')
+
+        with engine.connect() as conn:
+            before = run(conn, args.repeat)
+        with engine.begin() as conn:
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    if index.name in INDEXES:
+                        index.create(conn)
+            conn.exec_driver_sql('ANALYZE')
+        with engine.connect() as conn:
+            after = run(conn, args.repeat)
+
+        for label, _, _ in QUERIES:
+            (plan_before, ms_before), (plan_after, ms_after) = before[label], after[label]
+            print(f'{label:<26} {ms_before:>9.2f} ms -> {ms_after:>8.2f} ms   x{ms_before / max(ms_after, 1e-6):.0f}')
+            print(f'    before: {"; ".join(plan_before)}')
+            print(f'    after:  {"; ".join(plan_after)}')
+    finally:
+        engine.dispose()
+        if not args.keep:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,13 @@
+"""Load test for the REST API.
+
+Run from backend/:  python -m benchmarks.load [--mode inprocess|gunicorn|both] [--orders 50000] ...
+
+A database of the requested size is seeded (dataset.py), then virtual
+users run a weighted mix of visits (scenarios.py) for a fixed time: browse
+outlets, menus and search, log in, check out, reserve a table, and the
+owner dashboard with order management. The mix runs through Flask's test
+client in this process, against `gunicorn wsgi:app` on a local port, or
+both. p50/p95/p99 latency and requests per second are reported for every
+endpoint and written to a JSON file; pass an earlier file as `--compare`
+to see what moved.
+"""
@@ -0,0 +1,106 @@
+import argparse
+import os
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+
+from app import create_app
+from config import db
+from benchmarks.coldstart import free_port
+from . import __doc__ as DOC
+from . import dataset, report, runner
+
+RESULTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'results')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=runner.BACKEND,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=DOC.splitlines()[0])
+    parser.add_argument('--mode', choices=('inprocess', 'gunicorn', 'both'), default='both')
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--outlets', type=int, default=100)
+    parser.add_argument('--menu-items', type=int, default=30, help='per outlet')
+    parser.add_argument('--tables', type=int, default=60)
+    parser.add_argument('--orders', type=int, default=50000)
+    parser.add_argument('--reservations', type=int, default=5000)
+    parser.add_argument('--database', help='SQLite file to seed (default: a temporary file)')
+    parser.add_argument('--reuse', action='store_true', help='run against --database as it is, without seeding')
+    parser.add_argument('--concurrency', type=int, default=8, help='virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds per mode')
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--bcrypt-rounds', type=int, help="cost factor for seeded passwords and logins (default: the app's)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/load-<time>.json)')
+    parser.add_argument('--compare', help='an earlier results file to compare against')
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.database or os.path.join(tempfile.mkdtemp(), 'load.db'))
+    database_url = f'sqlite:///{path}'
+    overrides = {'SQLALCHEMY_DATABASE_URI': database_url}
+    environ = {}
+    if args.bcrypt_rounds:
+        overrides['BCRYPT_LOG_ROUNDS'] = args.bcrypt_rounds
+        environ['BCRYPT_LOG_ROUNDS'] = str(args.bcrypt_rounds)
+    app = create_app(overrides)
+
+    with app.app_context():
+        if not args.reuse:
+            if os.path.exists(path):
+                raise SystemExit(f'{path} exists; pass --reuse to run against it as it is.')
+            started = datetime.now()
+            dataset.seed(args)
+            print(f'seeded {path} in {(datetime.now() - started).total_seconds():.1f}s')
+        catalog = dataset.Catalog(db.session)
+        db.session.remove()
+
+    runs = {}
+    modes = ('inprocess', 'gunicorn') if args.mode == 'both' else (args.mode,)
+    for mode in modes:
+        print(f'\n{mode}: {args.concurrency} users for {args.duration:g}s after {args.warmup:g}s warm-up')
+        if mode == 'inprocess':
+            samples, seconds = runner.run(lambda: runner.TestClient(app), catalog,
+                                          args.concurrency, args.duration, args.warmup, args.seed)
+        else:
+            with runner.gunicorn(database_url, free_port(), args.workers, args.threads, environ) as base_url:
+                samples, seconds = runner.run(lambda: runner.HttpClient(base_url), catalog,
+                                              args.concurrency, args.duration, args.warmup, args.seed)
+        summary = report.summarize(samples, seconds)
+        runs[mode] = {"seconds": round(seconds, 2), "endpoints": summary}
+        print(report.render(summary, report.baseline(args.compare, mode) if args.compare else None))
+
+    meta = {
+        "started": datetime.now().isoformat(timespec='seconds'),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "database": path,
+        "sizes": {name: getattr(args, name) for name in
+                  ('users', 'outlets', 'menu_items', 'tables', 'orders', 'reservations')},
+        "seeded": not args.reuse,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "workers": args.workers,
+        "threads": args.threads,
+        "seed": args.seed,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS, exist_ok=True)
+        output = os.path.join(RESULTS, f'load-{datetime.now():%Y%m%d-%H%M%S}.json')
+    report.save(output, meta, runs)
+    print(f'\nresults saved to {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Seed a load-test database and read back the ids the scenarios pick from."""
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from config import db
+from models import User, Cuisine, Outlet, MenuItem, Table, Order, OrderItem, Reservation
+from passwords import hasher
+import rollups
+import search
+
+PASSWORD = 'loadtest'
+STATUSES = ('pending', 'preparing', 'delivered', 'completed', 'cancelled')
+CATEGORIES = ('Starter', 'Main', 'Dessert', 'Drink')
+WORDS = ('chicken beef lamb fish prawn tofu paneer rice noodle pilau biryani curry masala tikka burger '
+         'pizza wrap salad soup stew grilled fried spicy sweet garlic butter lemon coconut mango '
+         'chapati samosa kebab shawarma taco sushi ramen falafel hummus pasta risotto').split()
+# Reservations are spread over this many days from the day the database is seeded.
+RESERVATION_DAYS = 14
+BATCH = 10000
+# Customers the scenarios sign in as and order for.
+CUSTOMER_SAMPLE = 5000
+
+
+def _batches(rows, size=BATCH):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(args):
+    """Create the schema in the app's database and fill it to the sizes in `args`.
+
+    Runs in an app context. Every user shares one bcrypt hash of PASSWORD
+    at the app's cost factor, so logins cost what they do in production
+    without the seed paying for a hash per user. The search indexes and
+    rollup tables are rebuilt at the end, as after a migration.
+    """
+    rng = random.Random(args.seed)
+    db.create_all()
+    password_hash = hasher.hash(PASSWORD)
+    owners = max(1, args.outlets // 2)
+    now = datetime.now().replace(second=0, microsecond=0)
+    items = args.outlets * args.menu_items
+
+    with db.engine.begin() as conn:
+        for batch in _batches(
+            {'name': f'user{i}', 'email': f'user{i}@example.com', 'phone_no': 700000000 + i,
+             '_password_hash': password_hash, 'role': 'owner' if i <= owners else 'customer'}
+            for i in range(1, args.users + owners + 1)
+        ):
+            conn.execute(insert(User), batch)
+        conn.execute(insert(Cuisine), [{'name': word.title()} for word in WORDS[:20]])
+        conn.execute(insert(Outlet), [
+            {'name': f'{rng.choice(WORDS).title()} House {i}', 'description': ' '.join(rng.sample(WORDS, 6)),
+             'cuisine_id': rng.randint(1, 20), 'owner_id': (i - 1) % owners + 1}
+            for i in range(1, args.outlets + 1)
+        ])
+        prices = [rng.randint(200, 2000) for _ in range(items)]
+        for batch in _batches(
+            {'name': f'{" ".join(rng.sample(WORDS, 2)).title()} {i}', 'description': ' '.join(rng.sample(WORDS, 5)),
+             'price': prices[i - 1], 'category': rng.choice(CATEGORIES), 'outlet_id': (i - 1) // args.menu_items + 1}
+            for i in range(1, items + 1)
+        ):
+            conn.execute(insert(MenuItem), batch)
+        conn.execute(insert(Table), [
+            {'table_number': i, 'capacity': rng.choice((2, 4, 4, 6, 8))} for i in range(1, args.tables + 1)
+        ])
+
+        span = 180 * 24 * 3600
+        for first in range(1, args.orders + 1, BATCH):
+            orders, lines = [], []
+            for order_id in range(first, min(first + BATCH, args.orders + 1)):
+                outlet = rng.randrange(args.outlets)
+                total = 0
+                for item in rng.sample(range(outlet * args.menu_items, (outlet + 1) * args.menu_items),
+                                       min(args.menu_items, rng.randint(1, 4))):
+                    quantity = rng.randint(1, 3)
+                    total += prices[item] * quantity
+                    lines.append({'order_id': order_id, 'menuitem_id': item + 1, 'quantity': quantity,
+                                  'sub_total': prices[item] * quantity})
+                orders.append({'id': order_id, 'status': rng.choice(STATUSES), 'total_price': total,
+                               'user_id': rng.randint(owners + 1, owners + args.users),
+                               'created_at': now - timedelta(seconds=rng.randrange(span))})
+            conn.execute(insert(Order), orders)
+            conn.execute(insert(OrderItem), lines)
+
+        # Slots are half hours from 11:00, and each table is booked at most once per slot.
+        slots = RESERVATION_DAYS * 22
+        taken = rng.sample(range(args.tables * slots), min(args.reservations, args.tables * slots))
+        for batch in _batches(taken):
+            rows = []
+            for slot in batch:
+                table, slot = divmod(slot, slots)
+                day, half_hour = divmod(slot, 22)
+                start = now.replace(hour=11, minute=0) + timedelta(days=day + 1, minutes=30 * half_hour)
+                rows.append({'user_id': rng.randint(owners + 1, owners + args.users), 'table_id': table + 1,
+                             'booking_time': start, 'end_time': start + timedelta(minutes=30),
+                             'no_of_people': 2, 'status': 'confirmed'})
+            conn.execute(insert(Reservation), rows)
+
+    search.rebuild(db.session)
+    rollups.rebuild(db.session)
+    db.session.commit()
+
+
+class Catalog:
+    """The ids and values the scenarios choose from, read from a seeded database."""
+
+    def __init__(self, session):
+        self.customers = session.execute(
+            select(User.id, User.email).where(User.role == 'customer').order_by(func.random()).limit(CUSTOMER_SAMPLE)
+        ).all()
+        self.owners = dict(session.execute(select(Outlet.id, Outlet.owner_id)).all())
+        self.outlet_ids = sorted(self.owners)
+        self.menu = defaultdict(list)
+        for item_id, outlet_id in session.execute(select(MenuItem.id, MenuItem.outlet_id)):
+            self.menu[outlet_id].append(item_id)
+        self.outlet_ids = [outlet_id for outlet_id in self.outlet_ids if self.menu[outlet_id]]
+        self.max_party = session.execute(select(func.max(Table.capacity))).scalar() or 1
+        self.words = WORDS
+        self.first_day = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        if not self.customers or not self.outlet_ids:
+            raise SystemExit('The database has no customers or outlets with menus; seed it first.')
@@ -0,0 +1,69 @@
+"""Per-endpoint latency percentiles and throughput, saved as JSON and compared across runs."""
+import json
+import math
+from collections import Counter, defaultdict
+
+TOTAL = 'ALL'
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(samples, seconds):
+    """`{label: stats}` for every endpoint plus TOTAL; latencies in milliseconds."""
+    grouped = defaultdict(list)
+    for sample in samples:
+        grouped[sample[0]].append(sample)
+        grouped[TOTAL].append(sample)
+
+    summary = {}
+    for label, rows in sorted(grouped.items()):
+        latencies = sorted(latency * 1000 for _, _, latency, _ in rows)
+        summary[label] = {
+            "requests": len(rows),
+            "rps": round(len(rows) / seconds, 2),
+            "errors": sum(1 for *_, ok in rows if not ok),
+            "statuses": dict(sorted(Counter(str(status) for _, status, _, _ in rows).items())),
+            "mean_ms": round(sum(latencies) / len(latencies), 2),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2),
+        }
+    return summary
+
+
+def _change(new, old):
+    if not old:
+        return ''
+    return f'{(new - old) / old * 100:+.0f}%'
+
+
+def render(summary, baseline=None):
+    """A text table; with `baseline` (an earlier run's summary) p95 and rps changes are added."""
+    header = f'{"endpoint":<30} {"requests":>9} {"rps":>9} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"errors":>7}'
+    if baseline is not None:
+        header += f' {"p95 vs base":>12} {"rps vs base":>12}'
+    lines = [header, '-' * len(header)]
+    for label, stats in sorted(summary.items(), key=lambda item: (item[0] == TOTAL, item[0])):
+        line = (f'{label:<30} {stats["requests"]:>9} {stats["rps"]:>9.1f} {stats["p50_ms"]:>9.1f} '
+                f'{stats["p95_ms"]:>9.1f} {stats["p99_ms"]:>9.1f} {stats["errors"]:>7}')
+        if baseline is not None:
+            old = baseline.get(label, {})
+            line += f' {_change(stats["p95_ms"], old.get("p95_ms")):>12} {_change(stats["rps"], old.get("rps")):>12}'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def save(path, meta, runs):
+    """Write `{"meta": ..., "runs": {mode: {"seconds": ..., "endpoints": summary}}}`."""
+    with open(path, 'w') as file:
+        json.dump({"meta": meta, "runs": runs}, file, indent=2)
+
+
+def baseline(path, mode):
+    """The endpoint summary an earlier results file holds for `mode`, if any."""
+    with open(path) as file:
+        return json.load(file).get('runs', {}).get(mode, {}).get('endpoints')
@@ -0,0 +1,124 @@
+"""Drive the scenario mix with concurrent virtual users, in process or over HTTP."""
+import http.client
+import json as jsonlib
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from .scenarios import MIX
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestClient:
+    """Calls the app through Flask's test client: no sockets, no server."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, json=None, headers=None):
+        response = self.client.open(path, method=method, json=json, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpClient:
+    """Calls a running server over one kept-alive HTTP connection; status 0 means it failed."""
+
+    def __init__(self, base_url, timeout=60):
+        url = urlsplit(base_url)
+        self.host, self.port, self.timeout = url.hostname, url.port, timeout
+        self.connection = None
+
+    def request(self, method, path, json=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if json is not None:
+            body = jsonlib.dumps(json).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+            return 0, None
+        try:
+            return response.status, jsonlib.loads(data)
+        except ValueError:
+            return response.status, None
+
+
+@contextmanager
+def gunicorn(database_url, port, workers, threads, environ=None, timeout=60):
+    """Serve wsgi.py from backend/ on `port` until the block exits; yields the base URL."""
+    env = dict(os.environ, **(environ or {}), DATABASE_URL=database_url, GUNICORN_BIND=f'127.0.0.1:{port}',
+               WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads))
+    base_url = f'http://127.0.0.1:{port}'
+    with tempfile.TemporaryFile('w+') as log:
+        process = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'wsgi:app'], cwd=BACKEND, env=env,
+                                   stdout=log, stderr=subprocess.STDOUT)
+        try:
+            deadline = time.monotonic() + timeout
+            probe = HttpClient(base_url, timeout=1)
+            while probe.request('GET', '/')[0] != 200:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    log.seek(0)
+                    raise SystemExit(f'gunicorn did not start:\n{log.read()}')
+                time.sleep(0.1)
+            yield base_url
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def run(make_client, catalog, concurrency, duration, warmup, seed):
+    """Run the mix on `concurrency` threads for `warmup + duration` seconds.
+
+    Returns `(samples, seconds)`: one `(label, status, latency, ok)` per
+    request that finished after the warm-up, and the length of the measured
+    window. Each virtual user has its own client and a Random seeded from
+    `seed`, so a run's sequence of visits is repeatable.
+    """
+    scenarios, weights = zip(*MIX)
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    samples = []
+    lock = threading.Lock()
+    start_line = threading.Barrier(concurrency)
+
+    def user(index):
+        client = make_client()
+        rng = random.Random(seed * 100003 + index)
+        mine = []
+
+        def call(label, method, path, json=None, headers=None, expect=(200,)):
+            before = time.perf_counter()
+            status, body = client.request(method, path, json, headers)
+            after = time.perf_counter()
+            if after >= measure_from:
+                mine.append((label, status, after - before, status in expect))
+            return status, body
+
+        start_line.wait()
+        while time.perf_counter() < stop_at:
+            rng.choices(scenarios, weights)[0](call, catalog, rng)
+        with lock:
+            samples.extend(mine)
+
+    threads = [threading.Thread(target=user, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - measure_from
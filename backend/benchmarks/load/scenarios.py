@@ -0,0 +1,76 @@
+"""The request mix: each scenario is one visit by a user of the food court.
+
+A scenario gets `call(label, method, path, json=None, headers=None,
+expect=(200,))`, which times the request under `label` and returns
+`(status, body)`, the seeded `Catalog` and the virtual user's `Random`.
+Labels name the route, not the URL, so ids do not split the statistics.
+"""
+from datetime import timedelta
+
+from .dataset import PASSWORD, RESERVATION_DAYS
+
+
+def browse(call, catalog, rng):
+    call('GET /outlets', 'GET', '/outlets?limit=20')
+    outlet_id = rng.choice(catalog.outlet_ids)
+    call('GET /outlets/<id>', 'GET', f'/outlets/{outlet_id}')
+    call('GET /menu-items?outlet_id', 'GET', f'/menu-items?outlet_id={outlet_id}')
+    # A prefix, as typed into the search box.
+    word = rng.choice(catalog.words)
+    call('GET /search', 'GET', f'/search?q={word[:rng.randint(2, len(word))]}')
+
+
+def login(call, catalog, rng):
+    _, email = rng.choice(catalog.customers)
+    status, body = call('POST /login', 'POST', '/login', json={'email': email, 'password': PASSWORD})
+    if status == 200:
+        call('GET /check-auth', 'GET', '/check-auth', headers={'Authorization': f"Bearer {body['access_token']}"})
+
+
+def checkout(call, catalog, rng):
+    user_id, _ = rng.choice(catalog.customers)
+    menu = catalog.menu[rng.choice(catalog.outlet_ids)]
+    items = [{'menu_item_id': item_id, 'quantity': rng.randint(1, 3)}
+             for item_id in rng.sample(menu, min(len(menu), rng.randint(1, 4)))]
+    status, body = call('POST /orders/checkout', 'POST', '/orders/checkout',
+                        json={'user_id': user_id, 'items': items}, expect=(201,))
+    if status == 201:
+        call('GET /orders/<id>', 'GET', f"/orders/{body['id']}")
+
+
+def reserve(call, catalog, rng):
+    user_id, _ = rng.choice(catalog.customers)
+    start = catalog.first_day + timedelta(days=rng.randrange(RESERVATION_DAYS),
+                                          hours=rng.randint(11, 21), minutes=rng.choice((0, 30)))
+    party = rng.randint(1, catalog.max_party)
+    status, tables = call('GET /tables/available', 'GET',
+                          f'/tables/available?start={start.isoformat()}&party_size={party}')
+    if status == 200 and tables:
+        # Another user may take the table first; losing that race is a normal answer.
+        call('POST /reservations', 'POST', '/reservations', expect=(201, 409), json={
+            'user_id': user_id, 'table_id': rng.choice(tables[:3])['id'],
+            'booking_time': start.isoformat(), 'party_size': party,
+        })
+
+
+def owner_dashboard(call, catalog, rng):
+    outlet_id = rng.choice(catalog.outlet_ids)
+    call('GET /analytics/summary', 'GET', f'/analytics/summary?owner_id={catalog.owners[outlet_id]}')
+    status, page = call('GET /orders?outlet_id&status', 'GET',
+                        f'/orders?outlet_id={outlet_id}&status=pending&order=desc&limit=20')
+    if status == 200 and page['items']:
+        order = rng.choice(page['items'])
+        call('PATCH /orders/<id>', 'PATCH', f"/orders/{order['id']}", json={'status': 'preparing'})
+    day = catalog.first_day + timedelta(days=rng.randrange(RESERVATION_DAYS))
+    call('GET /reservations?booking', 'GET',
+         f'/reservations?booking_from={day.isoformat()}&booking_to={(day + timedelta(days=1)).isoformat()}&limit=50')
+
+
+# (scenario, weight): mostly browsing, with a steady trickle of writes.
+MIX = (
+    (browse, 50),
+    (login, 10),
+    (checkout, 15),
+    (reserve, 10),
+    (owner_dashboard, 15),
+)
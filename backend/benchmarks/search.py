@@ -0,0 +1,103 @@
+"""Search latency on a large synthetic catalog.
+
+Run from backend/:  python -m benchmarks.search [--menu-items 1000000]
+
+Menu items and outlets are bulk-inserted into a throwaway SQLite database
+with words drawn from a food vocabulary padded with synthetic words, with
+frequency falling off as 1/sqrt(rank): the commonest terms ("chicken")
+appear in roughly one item in ten and the rarest in a few hundred. The FTS5 indexes are built with
+`search.rebuild`, and a mix of whole-word, prefix and multi-word queries
+is timed through `search.search` (ranked ids + row load).
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app import create_app
+from config import db
+from models import MenuItem, Outlet
+import search
+
+WORDS = ('chicken beef lamb fish prawn tofu paneer rice noodle pilau biryani curry masala tikka burger '
+         'pizza wrap salad soup stew grilled fried spicy sweet sour garlic butter lemon coconut mango '
+         'chapati samosa kebab shawarma taco sushi ramen falafel hummus pasta lasagna risotto').split()
+SYLLABLES = ('ka', 'mo', 'ri', 'zu', 'ne', 'ta', 'lo', 'vi', 'sha', 'pe', 'du', 'gri')
+CATEGORIES = ('Main', 'Starter', 'Side', 'Dessert', 'Drink')
+QUERIES = ('chicken', 'chi', 'bi', 'spicy chick', 'coconut rice', 'garlic butter pr', 'sushi ramen', 'zzz')
+
+
+def vocabulary(rng, size):
+    words = list(WORDS)
+    while len(words) < size:
+        words.append(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    cumulative = list(itertools.accumulate(rank ** -0.5 for rank in range(1, len(words) + 1)))
+    return lambda count: ' '.join(rng.choices(words, cum_weights=cumulative, k=count))
+
+
+def seed(engine, args):
+    rng = random.Random(args.seed)
+    phrase = vocabulary(rng, args.vocabulary)
+    with engine.begin() as conn:
+        conn.execute(insert(Outlet), [
+            {'name': f'{phrase(1).title()} {rng.choice(("House", "Corner", "Kitchen", "Grill"))} {i}',
+             'description': phrase(6)}
+            for i in range(args.outlets)
+        ])
+        for first in range(0, args.menu_items, 50000):
+            conn.execute(insert(MenuItem), [
+                {'name': phrase(3).title(), 'description': phrase(8),
+                 'category': rng.choice(CATEGORIES), 'price': rng.randint(100, 3000),
+                 'outlet_id': rng.randint(1, args.outlets)}
+                for _ in range(first, min(first + 50000, args.menu_items))
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--menu-items', type=int, default=1000000)
+    parser.add_argument('--outlets', type=int, default=5000)
+    parser.add_argument('--vocabulary', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    app = create_app()
+
+    path = os.path.join(tempfile.mkdtemp(), 'search.db')
+    engine = create_engine(f'sqlite:///{path}')
+    try:
+        db.metadata.create_all(engine, tables=[Outlet.__table__, MenuItem.__table__])
+        with engine.begin() as conn:
+            search.drop_triggers(conn)  # bulk-load first, then build the indexes below
+        start = time.perf_counter()
+        seed(engine, args)
+        print(f'seeded {args.menu_items:,} menu items in {time.perf_counter() - start:.1f}s')
+
+        with Session(engine) as session, app.app_context():
+            start = time.perf_counter()
+            search.rebuild(session)
+            session.commit()
+            print(f'built indexes in {time.perf_counter() - start:.1f}s\n')
+            for q in QUERIES:
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    results = search.search(session, q, limit=args.limit)
+                    timings.append((time.perf_counter() - started) * 1000)
+                hits = sum(len(rows) for rows in results.values())
+                print(f'{q!r:<20} p50 {statistics.median(timings):7.2f} ms   '
+                      f'p95 {statistics.quantiles(timings, n=20)[-1]:7.2f} ms   {hits} rows')
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
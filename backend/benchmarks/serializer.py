@@ -0,0 +1,86 @@
+"""Parity check and micro-benchmark for the precompiled serializer plans.
+
+Run from backend/:  python -m benchmarks.serializer [--rows 20000]
+
+Every rule set the API uses is serialized for each row in the configured
+database with both `SerializerMixin.to_dict` and the planned `to_dict`, and
+the two must be equal. Rows/sec is then measured for `MenuItem` and
+`Order` on in-memory instances.
+"""
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy_serializer import SerializerMixin
+
+from app import create_app
+from models import User, Cuisine, Outlet, MenuItem, Table, Order, OrderItem, Reservation
+
+RULE_SETS = [
+    (User, ('-orders', '-reservations', '-outlets')),
+    (Cuisine, ('-outlets',)),
+    (Outlet, ('-menu_items', '-owner')),
+    (Outlet, ('-cuisine', '-menu_items', '-owner')),
+    (Outlet, ('-cuisine.outlets', '-menu_items.outlet', '-menu_items.order_items',
+              '-owner.outlets', '-owner.orders', '-owner.reservations')),
+    (MenuItem, ('-outlet', '-order_items')),
+    (Order, ('-reservation', '-order_items', '-user')),
+    (Order, ('-reservation', '-order_items', '-user-')),
+    (OrderItem, ('-order', '-menu_item')),
+    (OrderItem, ('-order.order_items', '-order.user', '-order.reservation',
+                 '-menu_item.order_items', '-menu_item.outlet')),
+    (Table, ('-outlet', '-reservations')),
+    (Reservation, ('-user', '-table', '-order')),
+    (Reservation, ('-user.reservations', '-user.orders', '-user.outlets', '-table.reservations', '-order')),
+]
+
+
+def check_parity():
+    checked = 0
+    for model, rules in RULE_SETS:
+        for row in model.query.all():
+            expected = SerializerMixin.to_dict(row, rules=rules)
+            actual = row.to_dict(rules=rules)
+            if expected != actual:
+                raise AssertionError(f'{model.__name__} {rules} row {row.id}:\n{expected}\n!=\n{actual}')
+            checked += 1
+    return checked
+
+
+def rows_per_second(serialize, rows):
+    start = time.perf_counter()
+    for row in rows:
+        serialize(row)
+    return len(rows) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+    app = create_app()
+
+    with app.app_context():
+        print(f'parity: {check_parity()} rows identical across {len(RULE_SETS)} rule sets')
+
+    samples = {
+        MenuItem: (('-outlet', '-order_items'), [
+            MenuItem(id=i, name=f'Dish {i}', description='Sample dish', price=500 + i % 700,
+                     category='Main', outlet_id=i % 30)
+            for i in range(args.rows)
+        ]),
+        Order: (('-reservation', '-order_items', '-user'), [
+            Order(id=i, status='pending', total_price=1250.5, user_id=i % 500,
+                  created_at=datetime(2025, 7, 23, 12, 30))
+            for i in range(args.rows)
+        ]),
+    }
+    for model, (rules, rows) in samples.items():
+        original = rows_per_second(lambda row: SerializerMixin.to_dict(row, rules=rules), rows)
+        planned = rows_per_second(lambda row: row.to_dict(rules=rules), rows)
+        print(f'{model.__name__:<10} SerializerMixin {original:>10,.0f} rows/s   '
+              f'planned {planned:>10,.0f} rows/s   x{planned / original:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Time to first byte and peak memory of GET /orders, buffered and streamed.
+
+Run from backend/:  python -m benchmarks.streaming [--orders 1000000] [--database PATH]
+
+A throwaway SQLite database is filled by `datagen.generate` (or `--database`
+reuses one), then GET /orders returns the newest N orders for growing N,
+selected with `?created_from=`, in three ways: the buffered bare list, and
+`?stream=json` and `?stream=ndjson`. Each request runs in a fresh
+interpreter through the test client with `buffered=False`, which reports
+when the first chunk arrives, the body size and the growth of the
+process's peak RSS over what building the app left it at.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = {'buffered': '', 'json': '&stream=json', 'ndjson': '&stream=ndjson'}
+
+CHILD = """
+import json, resource, sys, time
+from app import create_app
+app = create_app()
+client = app.test_client()
+client.get('/')
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+response = client.get(sys.argv[1], buffered=False)
+chunks = iter(response.response)
+size = len(next(chunks, b''))
+first = time.perf_counter()
+for chunk in chunks:
+    size += len(chunk)
+response.close()
+done = time.perf_counter()
+print(json.dumps({'status': response.status_code, 'ttfb': first - started, 'total': done - started, 'bytes': size,
+                  'rss': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024}))
+"""
+
+
+def build(path, orders, seed):
+    from app import create_app
+    from config import db
+    import datagen
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'BCRYPT_LOG_ROUNDS': 4})
+    with app.app_context():
+        db.create_all()
+        with db.engine.connect() as conn:
+            datagen.generate(conn, users=10000, outlets=50, menu_items=2000, tables=20, orders=orders,
+                             reservations=0, seed=seed)
+
+
+def newest(path, count):
+    """The `created_from` that selects the `count` newest orders."""
+    with sqlite3.connect(path) as conn:
+        row = conn.execute('SELECT created_at FROM orders ORDER BY created_at DESC LIMIT 1 OFFSET ?',
+                           (count - 1,)).fetchone()
+    return row[0].replace(' ', 'T')
+
+
+def measure(path, url):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}')
+    output = subprocess.run([sys.executable, '-c', CHILD, url], env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if output.returncode:
+        raise SystemExit(output.stderr)
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=1000000)
+    parser.add_argument('--database', help='reuse (or create) this SQLite file')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='rows per response')
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    path = args.database or os.path.join(tempfile.mkdtemp(), 'streaming.db')
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        build(path, args.orders, args.seed)
+        print(f'generated {args.orders:,} orders in {time.perf_counter() - started:.1f}s')
+    total = sqlite3.connect(path).execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+    print(f'{total:,} orders in {path}\n')
+
+    print(f'{"rows":>10} {"mode":<9} {"TTFB ms":>9} {"total s":>8} {"MB sent":>8} {"peak RSS +MB":>13}')
+    for size in (int(size) for size in args.sizes.split(',')):
+        size = min(size, total)
+        for mode in args.modes.split(','):
+            result = measure(path, f'/orders?created_from={newest(path, size)}{MODES[mode]}')
+            print(f'{size:>10,} {mode:<9} {result["ttfb"] * 1000:>9.1f} {result["total"]:>8.2f} '
+                  f'{result["bytes"] / 1e6:>8.1f} {result["rss"]:>13.1f}')
+    if not args.database:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
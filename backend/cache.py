@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+
+from flask import request
+
+from extensions import PerApp
+from pagination import stream_requested
+
+_MISSING = object()
+
+
+class ResponseCache:
+    """In-process LRU cache of GET response bodies with a TTL and tag invalidation.
+
+    Every entry is tagged with what it contains (`menu_item:5`,
+    `menu_item:outlet_id=2`, `cuisine:1`, ...) and list entries also with
+    `<kind>:list` and the filters they were asked for, so a write can drop
+    exactly the entries it affects. The cache is per process; the TTL bounds
+    how stale another worker's copy can get.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = defaultdict(set)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('CATALOG_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('CATALOG_CACHE_TTL', self.ttl)
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, tags):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tags[tag].add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def invalidate_changes(self, kind, id, changes, fields=()):
+        """Drop entries holding row `id` and the lists its new values now match."""
+        self.invalidate(f'{kind}:{id}', *(
+            f'{kind}:{field}={changes[field]}' for field in fields if field in changes
+        ))
+
+
+class CatalogCache(PerApp):
+    """The handle on each app's `ResponseCache`, plus the decorator that fills it.
+
+    `cached` is applied at import time, before any app exists, so it lives
+    on the handle and looks the app's cache up per request.
+    """
+
+    def cached(self, kind, fields=(), related=None):
+        """Cache a resource's GET responses under the tags of the rows they hold.
+
+        `fields` are the row columns lists can be filtered on; each row is
+        tagged `<kind>:<field>=<value>` so a write that changes one of them
+        reaches the filtered lists. `related` maps a row column to another
+        kind whose data is embedded in the row, e.g. `{'cuisine_id': 'cuisine'}`.
+        """
+        related = related or {}
+
+        def tags_for(body):
+            rows = body.get('items') if isinstance(body, dict) and 'items' in body else body
+            is_list = isinstance(rows, list)
+            tags = set()
+            if is_list:
+                tags.add(f'{kind}:list')
+                for name, value in request.args.items():
+                    if name in fields:
+                        tags.add(f'{kind}:{name}={value}')
+            for row in rows if is_list else [rows]:
+                if not isinstance(row, dict):
+                    continue
+                if 'id' in row:
+                    tags.add(f'{kind}:{row["id"]}')
+                for field in fields:
+                    if field in row:
+                        tags.add(f'{kind}:{field}={row[field]}')
+                for field, other in related.items():
+                    if row.get(field) is not None:
+                        tags.add(f'{other}:{row[field]}')
+            return frozenset(tags)
+
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(resource, *args, **kwargs):
+                # Streamed lists are never stored, and Accept can ask for one
+                # where the key below would find a cached array.
+                if stream_requested():
+                    return fn(resource, *args, **kwargs)
+                cache = self.for_app()
+                key = (request.path, tuple(sorted(request.args.items(multi=True))))
+                body = cache.get(key)
+                if body is not _MISSING:
+                    return body
+                result = fn(resource, *args, **kwargs)
+                body, status = result if isinstance(result, tuple) else (result, 200)
+                # Streamed responses can only be read once.
+                if status == 200 and isinstance(body, (dict, list)):
+                    cache.set(key, body, tags_for(body))
+                return result
+            return wrapper
+        return decorator
+
+
+catalog_cache = CatalogCache('catalog_cache', ResponseCache)
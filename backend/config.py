@@ -1,39 +1,89 @@
-from flask import Flask
+import os
+
 from flask_bcrypt import Bcrypt
-from flask_migrate import Migrate
 from flask_restful import Api
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import MetaData
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+
+from database import database_url
+
 
+class Config:
+    SQLALCHEMY_DATABASE_URI = database_url()
+    # SQLALCHEMY_ENGINE_OPTIONS and SQLITE_PRAGMAS default to what suits the
+    # URI (see database.py) unless a config sets them.
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    JWT_SECRET_KEY = 'supersecret'
+    JWT_BLACKLIST_ENABLED = True
+    JWT_BLACKLIST_TOKEN_CHECKS = ['access']
+    QUERY_COUNT_DEBUG = os.environ.get('QUERY_COUNT_DEBUG') == '1'
+    CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', 1024))
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 60))
+    JWT_REVOCATION_SYNC_INTERVAL = float(os.environ.get('JWT_REVOCATION_SYNC_INTERVAL', 1))
+    JWT_REVOCATION_PURGE_INTERVAL = float(os.environ.get('JWT_REVOCATION_PURGE_INTERVAL', 300))
+    # Seconds of already-synced revocations every sync re-reads; must exceed the
+    # longest a logout's transaction can take to commit.
+    JWT_REVOCATION_SYNC_OVERLAP = float(os.environ.get('JWT_REVOCATION_SYNC_OVERLAP', 60))
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    BCRYPT_MAX_CONCURRENCY = int(os.environ.get('BCRYPT_MAX_CONCURRENCY', os.cpu_count() or 2))
+    BCRYPT_QUEUE_SIZE = int(os.environ.get('BCRYPT_QUEUE_SIZE', 8))
+    BCRYPT_RETRY_AFTER = int(os.environ.get('BCRYPT_RETRY_AFTER', 1))
+    RESERVATION_DURATION = int(os.environ.get('RESERVATION_DURATION', 90))
+    RESERVATION_MAX_DURATION = int(os.environ.get('RESERVATION_MAX_DURATION', 240))
+    RESERVATION_SEARCH_DAYS = int(os.environ.get('RESERVATION_SEARCH_DAYS', 14))
+    RESERVATION_MAX_PARTY_SIZE = int(os.environ.get('RESERVATION_MAX_PARTY_SIZE', 100))
+    RESERVATION_BOOKING_ATTEMPTS = int(os.environ.get('RESERVATION_BOOKING_ATTEMPTS', 5))
+    # Most of one menu item a single checkout may order.
+    ORDER_MAX_QUANTITY = int(os.environ.get('ORDER_MAX_QUANTITY', 100))
+    ORDER_STREAM_POLL_INTERVAL = float(os.environ.get('ORDER_STREAM_POLL_INTERVAL', 0.5))
+    ORDER_STREAM_HEARTBEAT = float(os.environ.get('ORDER_STREAM_HEARTBEAT', 15))
+    ORDER_STREAM_QUEUE_SIZE = int(os.environ.get('ORDER_STREAM_QUEUE_SIZE', 100))
+    # Seconds of already-polled order events every poll re-reads; must exceed the
+    # longest an order change's transaction can take to commit.
+    ORDER_STREAM_SYNC_OVERLAP = float(os.environ.get('ORDER_STREAM_SYNC_OVERLAP', 60))
+    ORDER_EVENTS_RETENTION = float(os.environ.get('ORDER_EVENTS_RETENTION', 3600))
+    SEARCH_CANDIDATES = int(os.environ.get('SEARCH_CANDIDATES', 1000))
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    # Seconds; 0 leaves the slow-request log off.
+    SLOW_REQUEST_THRESHOLD = float(os.environ.get('SLOW_REQUEST_THRESHOLD', 0))
+    SLOW_REQUEST_KEEP = int(os.environ.get('SLOW_REQUEST_KEEP', 20))
+    BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JWT_SECRET_KEY'] = 'supersecret'
-app.config['JWT_BLACKLIST_ENABLED'] = True
-app.config['JWT_BLACKLIST_TOKEN_CHECKS'] = ['access']
 
-app.json.compact = False
+class TestConfig(Config):
+    """A private in-memory database and cheap password hashes per app instance."""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    BCRYPT_LOG_ROUNDS = 4
 
-CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
 
 metadata = MetaData(naming_convention={
+    "ix": "ix_%(column_0_label)s",
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
 })
 
-db = SQLAlchemy(metadata=metadata)
-migrate = Migrate(app, db)
-db.init_app(app)
+class JWTAwareApi(Api):
+    """An Api that leaves token errors to flask_jwt_extended's handlers.
+
+    flask_restful answers every other exception raised in a resource itself,
+    which would turn a missing, expired or revoked token into a 500.
+    Re-raising sends it back to the app's error handlers, which
+    JWTManager registers to answer 401/422.
+    """
 
-bcrypt = Bcrypt(app)
-api = Api(app)
-jwt = JWTManager(app)
-jwt_blacklist = set()
+    def handle_error(self, e):
+        if isinstance(e, (JWTExtendedException, PyJWTError)):
+            raise e
+        return super().handle_error(e)
 
-@jwt.token_in_blocklist_loader
-def check_if_token_revoked(jwt_header, jwt_payload):
-    jti = jwt_payload["jti"]
-    return jti in jwt_blacklist
 
+# Unbound extensions; create_app() in app.py binds them to each app instance.
+db = SQLAlchemy(metadata=metadata)
+bcrypt = Bcrypt()
+api = JWTAwareApi()
+jwt = JWTManager()
+cors = CORS(resources={r"/*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
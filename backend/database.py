@@ -0,0 +1,76 @@
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def database_url(environ=os.environ):
+    url = environ.get('DATABASE_URL', 'sqlite:///app.db')
+    # Hosting providers still hand out the pre-1.4 scheme.
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def _flag(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+def engine_options(url, environ=os.environ):
+    """SQLALCHEMY_ENGINE_OPTIONS for `url`, tuned from DB_POOL_* variables.
+
+    Server databases get a bounded QueuePool with pre-ping and recycling so
+    idle connections dropped by the server or a proxy are replaced rather
+    than surfacing as errors. In-memory SQLite keeps SQLAlchemy's
+    single-connection pool.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite':
+        options = {'connect_args': {
+            # pysqlite's own wait, in seconds, on top of PRAGMA busy_timeout.
+            'timeout': int(environ.get('SQLITE_BUSY_TIMEOUT', 5000)) / 1000,
+        }}
+        if url.database in (None, '', ':memory:'):
+            return options
+    else:
+        options = {
+            'pool_pre_ping': _flag(environ.get('DB_POOL_PRE_PING', '1')),
+            'pool_recycle': int(environ.get('DB_POOL_RECYCLE', 1800)),
+        }
+    options.update(
+        pool_size=int(environ.get('DB_POOL_SIZE', 5)),
+        max_overflow=int(environ.get('DB_MAX_OVERFLOW', 10)),
+        pool_timeout=float(environ.get('DB_POOL_TIMEOUT', 30)),
+    )
+    return options
+
+
+def sqlite_pragmas(environ=os.environ):
+    return {
+        'journal_mode': environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        # Negative cache_size is in KiB: 64 MiB of page cache per connection.
+        'cache_size': -int(environ.get('SQLITE_CACHE_SIZE_KB', 65536)),
+        'mmap_size': int(environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'temp_store': 'MEMORY',
+    }
+
+
+def init_sqlite(engine, pragmas):
+    """Apply `pragmas` to every new connection of a SQLite `engine`.
+
+    WAL lets readers run alongside the single writer, and busy_timeout
+    makes a writer wait for the lock instead of failing at once with
+    "database is locked". synchronous=NORMAL is durable across application
+    crashes in WAL mode and skips an fsync per commit.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
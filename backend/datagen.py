@@ -0,0 +1,370 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as clock, timedelta
+from itertools import accumulate
+from operator import itemgetter
+
+import click
+from faker import Faker
+from flask.cli import AppGroup
+from sqlalchemy import func, insert, inspect, select, text
+
+from config import db
+from models import User, Cuisine, Outlet, MenuItem, Table, Order, OrderItem, Reservation
+from passwords import hasher
+import rollups
+import search
+
+BATCH_SIZE = 10000
+PASSWORD = 'password123'
+# Distinct bcrypt hashes of the password, shared round-robin by every generated user.
+HASH_POOL = 4
+# Faker values drawn once per pool; rows are assembled from the pools.
+POOL_SIZE = 2000
+
+CUISINES = ('Swahili', 'Indian', 'Italian', 'Chinese', 'Japanese', 'Ethiopian', 'Lebanese', 'Mexican',
+            'American', 'Thai', 'Turkish', 'Greek', 'French', 'Korean', 'Somali', 'Vegan')
+FOODS = ('chicken beef lamb fish prawn tofu paneer rice noodle pilau biryani curry masala tikka burger '
+         'pizza wrap salad soup stew grilled fried spicy sweet sour garlic butter lemon coconut mango '
+         'chapati samosa kebab shawarma taco sushi ramen falafel hummus pasta lasagna risotto').split()
+OUTLET_KINDS = ('Kitchen', 'Grill', 'House', 'Bistro', 'Cafe', 'Eatery', 'Express', 'Corner')
+CATEGORIES = ('Starter', 'Main', 'Main', 'Main', 'Side', 'Dessert', 'Drink')
+CAPACITIES = (2, 2, 4, 4, 4, 6, 8)
+ORDER_STATUSES = ('completed',) * 6 + ('delivered',) * 2 + ('pending', 'preparing', 'cancelled')
+# Lines per order and quantity per line, weighted by repetition.
+LINES = (1, 1, 2, 2, 3, 4)
+QUANTITIES = (1, 1, 1, 2, 2, 3)
+# Relative order volume by hour of day: a lunch and a dinner peak.
+HOURLY = (0, 0, 0, 0, 0, 0, 1, 2, 3, 3, 4, 8, 12, 10, 5, 3, 3, 5, 9, 11, 8, 4, 2, 1)
+# Reservations start on this grid, one booking per table per slot, so none overlap.
+FIRST_SEATING = clock(11, 0)
+SEATINGS = 7
+SEATING_MINUTES = 90
+UPCOMING_DAYS = 14
+
+
+class Pools:
+    """Faker output sampled once and reused, since calling Faker per row is far too slow."""
+
+    def __init__(self, seed):
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.first_names = [fake.first_name() for _ in range(POOL_SIZE)]
+        self.last_names = [fake.last_name() for _ in range(POOL_SIZE)]
+        self.domains = [fake.free_email_domain() for _ in range(20)]
+        self.phrases = [fake.sentence(nb_words=8) for _ in range(POOL_SIZE)]
+        self.image_urls = [fake.image_url() for _ in range(50)]
+        self.contacts = [fake.phone_number() for _ in range(POOL_SIZE)]
+
+
+def _next_id(conn, column):
+    return (conn.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+def _chunks(total, size):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+def _insert(conn, model, batches):
+    """Insert each batch of row dicts with one executemany and commit it; returns the row count.
+
+    On a positional DBAPI (SQLite) the Core INSERT is compiled once and the
+    rows go to the driver as tuples, passed only through the bind
+    processors their column types need. That skips SQLAlchemy's per-row
+    parameter handling, which costs more than the insert itself. Rows that
+    leave out columns with Python-side defaults take the ordinary path.
+    """
+    count = 0
+    prepared = None
+    for rows in batches:
+        if not rows:
+            continue
+        if prepared is None:
+            compiled = insert(model).compile(dialect=conn.dialect, column_keys=list(rows[0]))
+            keys = compiled.positiontup if compiled.positional else ()
+            prepared = bool(keys) and set(keys) <= rows[0].keys()
+            columns = model.__table__.c
+            processors = [(key, processor) for key in keys if (
+                processor := columns[key].type.dialect_impl(conn.dialect).bind_processor(conn.dialect))]
+        if prepared:
+            for key, processor in processors:
+                for row in rows:
+                    row[key] = processor(row[key])
+            row_values = itemgetter(*keys)
+            conn.exec_driver_sql(compiled.string, [row_values(row) for row in rows])
+        else:
+            conn.execute(insert(model), rows)
+        conn.commit()
+        count += len(rows)
+    return count
+
+
+@contextmanager
+def bulk_load(conn, models):
+    """Set the database up for a bulk load into `models`' tables and restore it afterwards.
+
+    The secondary indexes are dropped and built once at the end, which is
+    several times cheaper than updating them on every insert; unique ones
+    stay, as they guard the rows being inserted. On SQLite the search
+    triggers go too, the full-text indexes are rebuilt at the end, and
+    commits skip fsync: a crash mid-load leaves a partial dataset either way.
+    """
+    inspector = inspect(conn)
+    indexes = []
+    for model in models:
+        existing = {index['name'] for index in inspector.get_indexes(model.__tablename__)}
+        indexes += [index for index in model.__table__.indexes if not index.unique and index.name in existing]
+    sqlite = conn.dialect.name == 'sqlite'
+    for index in indexes:
+        index.drop(conn)
+    if sqlite:
+        search.drop_triggers(conn)
+    conn.commit()
+    if sqlite:
+        synchronous = conn.exec_driver_sql('PRAGMA synchronous').scalar()
+        conn.exec_driver_sql('PRAGMA synchronous = OFF')
+    try:
+        yield
+    finally:
+        conn.rollback()
+        if sqlite:
+            conn.exec_driver_sql(f'PRAGMA synchronous = {synchronous}')
+        for index in indexes:
+            index.create(conn)
+        if sqlite:
+            search.rebuild(conn)
+        conn.commit()
+
+
+def generate(conn, users=1000, owners=None, outlets=20, menu_items=600, tables=40, orders=10000,
+             reservations=2000, days=180, anchor=None, seed=1, batch_size=BATCH_SIZE, password=PASSWORD,
+             progress=None):
+    """Append synthetic rows to the database behind `conn` and return `{table: rows}`.
+
+    Everything is drawn from `random.Random(seed)` and Faker pools seeded
+    the same way, with timestamps relative to `anchor` (default: today at
+    midnight), so a seed and anchor always give the same data. Ids continue
+    after the existing rows, and names, emails and table numbers embed them,
+    so repeated runs add to a database rather than clash with it. The first
+    `owners` users (default: one in fifty) own the outlets; every user's
+    password is `password`, hashed only HASH_POOL times. Orders span the
+    `days` before the anchor with lunch and dinner peaks; reservations fill
+    distinct seatings from a month before the anchor to two weeks after.
+
+    Rows go in through Core executemany inserts, `batch_size` rows per
+    statement and commit, with each batch's random values drawn column by
+    column. Secondary indexes are built once the rows are in (see
+    `bulk_load`). `progress(table, rows, seconds)` is called after
+    each table.
+    """
+    rng = random.Random(seed)
+    pools = Pools(seed)
+    anchor = anchor or datetime.combine(datetime.now().date(), clock())
+    users = max(users, 1)
+    owners = min(users, max(1, users // 50 if owners is None else owners))
+    counts = {}
+
+    def timed(table, rows):
+        started = time.perf_counter()
+        counts[table] = count = rows()
+        if progress is not None:
+            progress(table, count, time.perf_counter() - started)
+
+    with bulk_load(conn, (Outlet, MenuItem, Order, OrderItem, Reservation)):
+        # -- users ------------------------------------------------------- #
+        first_user = _next_id(conn, User.id)
+        hashes = [hasher.hash(password) for _ in range(HASH_POOL)]
+
+        def user_batches():
+            for start, size in _chunks(users, batch_size):
+                ids = range(first_user + start, first_user + start + size)
+                yield [
+                    {'id': id, 'name': f'{first} {last} {id}', 'email': f'{first}.{last}.{id}@{domain}'.lower(),
+                     'phone_no': phone, '_password_hash': hashes[id % HASH_POOL],
+                     'role': 'owner' if id < first_user + owners else 'customer'}
+                    for id, first, last, domain, phone in zip(
+                        ids, rng.choices(pools.first_names, k=size), rng.choices(pools.last_names, k=size),
+                        rng.choices(pools.domains, k=size), rng.choices(range(700000000, 800000000), k=size))
+                ]
+
+        timed('users', lambda: _insert(conn, User, user_batches()))
+        # Orders and reservations belong to customers, or to the only user there is.
+        customers = range(first_user + owners, first_user + users) or range(first_user, first_user + 1)
+
+        # -- cuisines and outlets ---------------------------------------- #
+        cuisine_ids = conn.execute(select(Cuisine.id)).scalars().all()
+        if not cuisine_ids:
+            conn.execute(insert(Cuisine), [{'name': name, 'img_url': rng.choice(pools.image_urls)}
+                                           for name in CUISINES])
+            conn.commit()
+            cuisine_ids = conn.execute(select(Cuisine.id)).scalars().all()
+
+        first_outlet = _next_id(conn, Outlet.id)
+
+        def outlet_batches():
+            for start, size in _chunks(outlets, batch_size):
+                yield [
+                    {'id': first_outlet + index, 'name': f"{last}'s {food.title()} {kind}", 'description': phrase,
+                     'contact': contact, 'img_url': img_url, 'cuisine_id': cuisine_id,
+                     'owner_id': first_user + index % owners}
+                    for index, last, food, kind, phrase, contact, img_url, cuisine_id in zip(
+                        range(start, start + size), rng.choices(pools.last_names, k=size),
+                        rng.choices(FOODS, k=size), rng.choices(OUTLET_KINDS, k=size),
+                        rng.choices(pools.phrases, k=size), rng.choices(pools.contacts, k=size),
+                        rng.choices(pools.image_urls, k=size), rng.choices(cuisine_ids, k=size))
+                ]
+
+        timed('outlets', lambda: _insert(conn, Outlet, outlet_batches()))
+
+        # -- menu items: item n belongs to outlet n % outlets ------------ #
+        first_item = _next_id(conn, MenuItem.id)
+        prices = rng.choices(range(150, 2500, 10), k=menu_items)
+
+        def menu_item_batches():
+            for start, size in _chunks(menu_items, batch_size):
+                yield [
+                    {'id': first_item + index, 'name': f'{food.title()} {other} {first_item + index}',
+                     'description': phrase, 'price': prices[index], 'category': category,
+                     'outlet_id': first_outlet + index % outlets}
+                    for index, food, other, phrase, category in zip(
+                        range(start, start + size), rng.choices(FOODS, k=size), rng.choices(FOODS, k=size),
+                        rng.choices(pools.phrases, k=size), rng.choices(CATEGORIES, k=size))
+                ]
+
+        timed('menu_items', lambda: _insert(conn, MenuItem, menu_item_batches()))
+
+        # -- tables -------------------------------------------------------- #
+        first_table = _next_id(conn, Table.id)
+        first_number = (conn.execute(select(func.max(Table.table_number))).scalar() or 0) + 1
+        timed('tables', lambda: _insert(conn, Table, (
+            [{'id': first_table + index, 'table_number': first_number + index, 'capacity': capacity}
+             for index, capacity in zip(range(start, start + size), rng.choices(CAPACITIES, k=size))]
+            for start, size in _chunks(tables, batch_size)
+        )))
+
+        # -- orders and their items -------------------------------------- #
+        first_order = _next_id(conn, Order.id)
+        # Outlets that got at least one menu item, and how many each has.
+        stocked = [len(range(outlet, menu_items, outlets)) for outlet in range(min(outlets, menu_items))]
+        order_days = [anchor - timedelta(days=day + 1) for day in range(days)]
+        # Five-minute slots through the day, weighted by their hour, plus seconds within the slot.
+        slots = [timedelta(minutes=minute) for minute in range(0, 24 * 60, 5)]
+        slot_weights = list(accumulate(HOURLY[index // 12] for index in range(len(slots))))
+        seconds = [timedelta(seconds=second) for second in range(300)]
+
+        def order_batches():
+            # An order's lines are consecutive items of one outlet's menu, inserted in the same batch.
+            for start, size in _chunks(orders, batch_size):
+                order_rows, item_rows = [], []
+                quantities = iter(rng.choices(QUANTITIES, k=size * max(LINES)))
+                for id, outlet, lines, offset, status, user_id, day, slot, second in zip(
+                    range(first_order + start, first_order + start + size),
+                    rng.choices(range(len(stocked)), k=size), rng.choices(LINES, k=size),
+                    [rng.random() for _ in range(size)], rng.choices(ORDER_STATUSES, k=size),
+                    rng.choices(customers, k=size), rng.choices(order_days, k=size),
+                    rng.choices(slots, cum_weights=slot_weights, k=size), rng.choices(seconds, k=size),
+                ):
+                    available = stocked[outlet]
+                    first_slot = int(offset * available)
+                    total = 0
+                    for line in range(min(lines, available)):
+                        item = outlet + (first_slot + line) % available * outlets
+                        quantity = next(quantities)
+                        sub_total = prices[item] * quantity
+                        total += sub_total
+                        item_rows.append({'order_id': id, 'menuitem_id': first_item + item,
+                                          'quantity': quantity, 'sub_total': sub_total})
+                    order_rows.append({'id': id, 'status': status, 'total_price': total, 'user_id': user_id,
+                                       'created_at': day + slot + second})
+                yield order_rows, item_rows
+
+        def insert_orders():
+            lines = 0
+            for order_rows, item_rows in order_batches():
+                _insert(conn, Order, [order_rows])
+                lines += _insert(conn, OrderItem, [item_rows])
+            counts['order_items'] = lines
+            return orders
+
+        if stocked and days > 0:
+            timed('orders', insert_orders)
+
+        # -- reservations: distinct (table, seating) pairs around the anchor #
+        past = min(days, 30)
+        seatings = (past + UPCOMING_DAYS) * SEATINGS
+        taken = sorted(rng.sample(range(tables * seatings), min(reservations, tables * seatings)))
+        starts = [datetime.combine((anchor + timedelta(days=day - past)).date(), FIRST_SEATING)
+                  + timedelta(minutes=SEATING_MINUTES * sitting)
+                  for day in range(past + UPCOMING_DAYS) for sitting in range(SEATINGS)]
+        length = timedelta(minutes=SEATING_MINUTES)
+        booked_ahead = [timedelta(days=day) for day in range(1, 15)]
+
+        def reservation_batches():
+            for start, size in _chunks(len(taken), batch_size):
+                yield [
+                    {'user_id': user_id, 'table_id': first_table + slot // seatings,
+                     'booking_time': starts[slot % seatings], 'end_time': starts[slot % seatings] + length,
+                     'no_of_people': party,
+                     'status': 'completed' if starts[slot % seatings] < anchor else upcoming,
+                     'created_at': starts[slot % seatings] - ahead}
+                    for slot, user_id, party, upcoming, ahead in zip(
+                        taken[start:start + size], rng.choices(customers, k=size), rng.choices((1, 2, 3, 4), k=size),
+                        rng.choices(('confirmed', 'cancelled'), (9, 1), k=size), rng.choices(booked_ahead, k=size))
+                ]
+
+        timed('reservations', lambda: _insert(conn, Reservation, reservation_batches()))
+        _sync_sequences(conn)
+    return counts
+
+
+def _sync_sequences(conn):
+    # Explicit ids do not advance PostgreSQL's serial sequences.
+    if conn.dialect.name != 'postgresql':
+        return
+    for model in (User, Outlet, MenuItem, Table, Order, OrderItem, Reservation):
+        table = model.__tablename__
+        conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                          f"COALESCE((SELECT MAX(id) FROM {table}), 1))"))
+    conn.commit()
+
+
+datagen_cli = AppGroup('datagen', help='Generate synthetic data at production scale.')
+
+
+@datagen_cli.command('generate')
+@click.option('--users', default=10000, show_default=True)
+@click.option('--owners', type=int, help='Users who own the outlets.  [default: users / 50]')
+@click.option('--outlets', default=200, show_default=True)
+@click.option('--menu-items', default=6000, show_default=True)
+@click.option('--tables', default=100, show_default=True)
+@click.option('--orders', default=100000, show_default=True, help='Each with 1-4 order items.')
+@click.option('--reservations', default=10000, show_default=True)
+@click.option('--days', default=180, show_default=True, help='Days of order history.')
+@click.option('--anchor', type=click.DateTime(), help='"Now" for the generated timestamps.  [default: today]')
+@click.option('--seed', default=1, show_default=True)
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+@click.option('--password', default=PASSWORD, show_default=True, help="Every generated user's password.")
+@click.option('--create-tables', is_flag=True, help='Create missing tables first (without migrations).')
+def generate_command(create_tables, **options):
+    """Append synthetic users, outlets, menus, orders and reservations."""
+    if create_tables:
+        db.create_all()
+
+    def progress(table, rows, seconds):
+        click.echo(f'{table:<14} {rows:>10,} rows in {seconds:6.1f}s  ({rows / max(seconds, 1e-9):>10,.0f} rows/s)')
+
+    started = time.perf_counter()
+    with db.engine.connect() as conn:
+        counts = generate(conn, progress=progress, **options)
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    click.echo(f'{"total":<14} {total:>10,} rows in {elapsed:6.1f}s  ({total / elapsed:>10,.0f} rows/s), '
+               f'indexes included')
+
+    # Bulk inserts bypass the ORM hooks that keep the rollup tables current.
+    started = time.perf_counter()
+    rollups.rebuild(db.session)
+    db.session.commit()
+    click.echo(f'Rollups rebuilt in {time.perf_counter() - started:.1f}s.')
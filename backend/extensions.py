@@ -0,0 +1,29 @@
+from flask import current_app
+
+
+class PerApp:
+    """A module-level handle on state that each app keeps in `app.extensions[name]`.
+
+    `init_app` gives the app its own `factory()` instance and lets that
+    instance configure itself from the app. Attribute access on the handle
+    is forwarded to the current app's instance, so several apps built in
+    one process (tests, `create_app` with different configs) never share a
+    pool, cache, mirror or poller.
+    """
+
+    def __init__(self, name, factory):
+        self._name = name
+        self._factory = factory
+
+    def init_app(self, app):
+        state = app.extensions[self._name] = self._factory()
+        state.init_app(app)
+        return state
+
+    def for_app(self, app=None):
+        return (app or current_app).extensions[self._name]
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        return getattr(self.for_app(), attr)
@@ -0,0 +1,66 @@
+from flask import request
+from flask_restful import abort
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+from loading import eager
+from serialization import plan_for
+
+
+def available(model, rules=()):
+    """The keys `model` serializes to under `rules`: its columns, then its relationships."""
+    plan = plan_for(model, rules)
+    return plan.columns + [relationship[0] for relationship in plan.relationships]
+
+
+def _foreign_keys(mapper, name):
+    """The local column keys relationship `name` is loaded through (none for collections)."""
+    return [mapper.get_property_by_column(column).key for column in mapper.attrs[name].local_columns
+            if column.table is mapper.local_table and not column.primary_key]
+
+
+def requested(model, rules=(), keep=()):
+    """The fields the request's `?fields=a,b` asks for, or None when it asks for all.
+
+    Unknown fields are rejected with a 400 before any query runs. The
+    primary key, the foreign key of each requested relationship and the
+    `keep` columns are always included: the response cache tags rows by
+    them, so a sparse row must carry them for writes to invalidate it.
+    """
+    value = request.args.get('fields')
+    if value is None:
+        return None
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    choices = available(model, rules)
+    unknown = [name for name in names if name not in choices]
+    if unknown:
+        abort(400, error=f"Unknown fields: {', '.join(unknown)}. Choose from {', '.join(choices)}.")
+    if not names:
+        abort(400, error="'fields' must name at least one field.")
+    mapper = inspect(model)
+    keys = [key for name in names if name in mapper.relationships for key in _foreign_keys(mapper, name)]
+    return tuple(dict.fromkeys(['id', *names, *keys, *keep]))
+
+
+def options(model, fields, eager_paths=()):
+    """Loader options for serializing only `fields` (all fields when None).
+
+    Only the requested columns are SELECTed, and only the requested
+    relationships among `eager_paths` are eager-loaded.
+    """
+    if fields is None:
+        return eager(model, *eager_paths)
+    mapper = inspect(model)
+    columns = [getattr(model, name) for name in fields if name in mapper.column_attrs]
+    paths = [path for path in eager_paths if path.split('.')[0] in fields]
+    return (load_only(*columns), *eager(model, *paths))
+
+
+def sparse(model, rules=(), eager_paths=(), keep=()):
+    """`(serialize, options)` for a GET of `model` rows serialized under `rules`, honouring `?fields=`."""
+    fields = requested(model, rules, keep)
+    if fields is None:
+        serialize = lambda obj: obj.to_dict(rules=rules)
+    else:
+        serialize = lambda obj: obj.to_dict(rules=rules, only=fields)
+    return serialize, options(model, fields, eager_paths)
@@ -0,0 +1,35 @@
+"""gunicorn settings, read from backend/ by default:  gunicorn wsgi:app
+
+GET /orders/stream belongs on the gevent server in gunicorn_sse.conf.py;
+here each open stream would hold one of a worker's threads.
+
+Each worker logs its cold start: the time from fork until it is ready to
+accept requests. Without preloading that includes importing and building
+the app; with it (the default) the master pays that once, and its time is
+logged when the server is ready.
+"""
+import os
+import sys
+import time
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:5555')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def when_ready(server):
+    wsgi = sys.modules.get('wsgi')
+    if wsgi is not None:
+        server.log.info('App preloaded in %.0f ms', wsgi.boot_seconds * 1000)
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+    wsgi = sys.modules.get('wsgi')
+    if wsgi is not None:
+        wsgi.dispose_engines()
+
+
+def post_worker_init(worker):
+    worker.log.info('Worker %s cold start %.0f ms', worker.pid, (time.perf_counter() - worker.forked_at) * 1000)
@@ -0,0 +1,31 @@
+"""gunicorn settings for the order stream:  gunicorn -c gunicorn_sse.conf.py wsgi:app
+
+GET /orders/stream keeps its connection open for as long as the client
+listens. On the main server (gunicorn.conf.py, gthread) every listener
+holds one of a worker's GUNICORN_THREADS, so a handful of open tabs
+exhausts a worker. This second server runs gevent workers, where an idle
+subscriber is a parked greenlet waiting on its Event, and the reverse
+proxy sends only that path here, unbuffered:
+
+    location /orders/stream {
+        proxy_pass http://127.0.0.1:5556;
+        proxy_buffering off;
+        proxy_read_timeout 1h;
+    }
+
+Everything else stays on the threaded server: bcrypt runs in C without
+yielding and would stall a gevent worker's whole loop.
+"""
+import os
+
+bind = os.environ.get('SSE_BIND', '127.0.0.1:5556')
+worker_class = 'gevent'
+workers = int(os.environ.get('SSE_WORKERS', 1))
+# Open streams per worker.
+worker_connections = int(os.environ.get('SSE_WORKER_CONNECTIONS', 10000))
+# gevent patches threading and sockets when the worker boots; the app's locks,
+# Events and pools must be created after that, so it is not preloaded.
+preload_app = False
+# Streams idle between heartbeats (ORDER_STREAM_HEARTBEAT), which a sync
+# worker timeout would count as a hang; gevent workers only need to notify.
+timeout = int(os.environ.get('SSE_TIMEOUT', 60))
@@ -0,0 +1,88 @@
+import logging
+from collections import defaultdict
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, selectinload
+
+logger = logging.getLogger(__name__)
+
+
+def eager(model, *paths):
+    """Loader options for the relationships a resource serializes.
+
+    Each path is a dotted chain of relationship names starting at `model`.
+    Many-to-one hops are joined into the parent SELECT; collections are
+    fetched with one extra `IN` query per hop, so the statement count stays
+    constant however many rows the page holds.
+    """
+    options = []
+    for path in paths:
+        option, current = None, model
+        for name in path.split('.'):
+            attr = getattr(current, name)
+            prop = attr.property
+            loader = selectinload if prop.uselist else joinedload
+            option = loader(attr) if option is None else getattr(option, loader.__name__)(attr)
+            current = prop.mapper.class_
+        options.append(option)
+    return tuple(options)
+
+
+# ------------------ QUERY COUNT DEBUG ------------------ #
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_statements += 1
+
+
+def _result_rows(response):
+    # A streamed list would be buffered whole to count it.
+    if not response.is_json or response.is_streamed:
+        return None
+    body = response.get_json(silent=True)
+    if isinstance(body, list):
+        return len(body)
+    if isinstance(body, dict):
+        return len(body['items']) if isinstance(body.get('items'), list) else 1
+    return None
+
+
+def init_query_debug(app):
+    """Count SQL statements per request when QUERY_COUNT_DEBUG is set.
+
+    The count is returned in an `X-SQL-Statements` header, and an endpoint
+    whose count rises with the number of rows it returns is logged as a
+    likely N+1.
+    """
+    if not app.config.get('QUERY_COUNT_DEBUG'):
+        return
+    # endpoint -> {result rows: statements issued}
+    observations = app.extensions['query_debug'] = defaultdict(dict)
+
+    @app.before_request
+    def _start_count():
+        g.sql_statements = 0
+
+    @app.after_request
+    def _report_count(response):
+        statements = g.pop('sql_statements', None)
+        if statements is None:
+            return response
+        response.headers['X-SQL-Statements'] = str(statements)
+
+        rows = _result_rows(response)
+        if rows is None or request.endpoint is None:
+            return response
+        key = f'{request.method} {request.endpoint}'
+        seen = observations[key]
+        seen[rows] = statements
+        smallest, largest = min(seen), max(seen)
+        if largest > smallest and seen[largest] > seen[smallest]:
+            logger.warning(
+                '%s issued %d statements for %d rows but %d for %d rows; '
+                'a serialized relationship is probably lazy loading per row.',
+                key, seen[largest], largest, seen[smallest], smallest,
+            )
+        return response
@@ -0,0 +1,192 @@
+import codecs
+import csv
+import io
+import json
+import re
+
+from flask import Response, stream_with_context
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from config import db
+from models import INTEGER_MAX, MenuItem
+
+FIELDS = ('name', 'description', 'price', 'category')
+# Media type -> format name, for Content-Type on import and Accept on export.
+FORMATS = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+MEDIA_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+BATCH_SIZE = 1000
+# The report lists at most this many rejected rows; `failed` counts them all.
+MAX_ERRORS = 1000
+
+
+def _lines(stream):
+    """The stream's lines as raw bytes, without a leading UTF-8 byte order mark.
+
+    Each line is decoded on its own (no UTF-8 sequence contains a newline
+    byte), so a bad byte is pinned to its row instead of failing the upload.
+    """
+    for number, line in enumerate(stream):
+        yield line.removeprefix(codecs.BOM_UTF8) if number == 0 else line
+
+
+def parse(stream, format):
+    """Yield `(row_number, record)` from a CSV or NDJSON byte stream, one record at a time.
+
+    Rows are numbered from 1, not counting the CSV header or blank NDJSON
+    lines. `record` is a dict, or an error message when the row cannot be
+    read at all. An NDJSON line that is not UTF-8 is one such row; in CSV
+    it could be inside a quoted field, so parsing stops there.
+    """
+    if format == 'csv':
+        number = 0
+        try:
+            for number, record in enumerate(csv.DictReader(line.decode('utf-8') for line in _lines(stream)), 1):
+                if None in record:
+                    yield number, "Row has more fields than the header."
+                else:
+                    yield number, record
+        except UnicodeDecodeError:
+            yield number + 1, "Row is not valid UTF-8; the rows after it were not read."
+        return
+
+    number = 0
+    for line in _lines(stream):
+        try:
+            line = line.decode('utf-8')
+        except UnicodeDecodeError:
+            number += 1
+            yield number, "Row is not valid UTF-8."
+            continue
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, "Invalid JSON."
+            continue
+        yield number, record if isinstance(record, dict) else "Expected a JSON object."
+
+
+def clean(record):
+    """Return `(values, None)` for a valid record or `(None, error)`.
+
+    CSV gives every field as a string, so empty strings count as missing
+    and the price is parsed from text.
+    """
+    name = record.get('name')
+    if not isinstance(name, str) or not name.strip():
+        return None, "Name is required."
+    price = record.get('price')
+    if isinstance(price, str) and re.fullmatch(r'[0-9]+', price.strip()):
+        price = int(price)
+    if isinstance(price, bool) or not isinstance(price, int) or not 0 <= price <= INTEGER_MAX:
+        return None, f"Price must be a whole number from 0 to {INTEGER_MAX}."
+    values = {'name': name.strip(), 'price': price}
+    for field in ('description', 'category'):
+        value = record.get(field)
+        if value is not None and not isinstance(value, str):
+            return None, f"{field.capitalize()} must be text."
+        values[field] = (value or '').strip() or None
+    return values, None
+
+
+def _upsert(outlet_id, batch):
+    """Insert or update one batch in its own transaction; returns `(created, updated_ids)`."""
+    names = [values['name'] for _, values in batch]
+    existing = dict(db.session.execute(
+        select(MenuItem.name, MenuItem.id).where(MenuItem.outlet_id == outlet_id, MenuItem.name.in_(names))
+    ).all())
+    new = [dict(values, outlet_id=outlet_id) for _, values in batch if values['name'] not in existing]
+    changed = [dict(values, id=existing[values['name']]) for _, values in batch if values['name'] in existing]
+    if new:
+        db.session.execute(insert(MenuItem), new)
+    if changed:
+        db.session.execute(update(MenuItem), changed)
+    db.session.commit()
+    return len(new), [values['id'] for values in changed]
+
+
+def import_menu(outlet_id, records, batch_size=BATCH_SIZE):
+    """Upsert `(row_number, record)` pairs into an outlet's menu, keyed on the item name.
+
+    Each batch is looked up with one IN query and written in its own
+    transaction, so memory stays flat however long the upload is and a
+    failed batch does not undo the ones before it. Returns the report
+    `{"created", "updated", "failed", "errors"}` and the ids of the updated
+    items; `errors` lists `{"row", "error"}` for the first MAX_ERRORS
+    rejected rows.
+    """
+    report = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+    updated_ids, seen, batch = [], set(), []
+
+    def reject(number, error):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_ERRORS:
+            report["errors"].append({"row": number, "error": error})
+
+    def flush():
+        try:
+            created, ids = _upsert(outlet_id, batch)
+        except IntegrityError:
+            # A concurrent write took one of the names; the whole batch was rolled back.
+            db.session.rollback()
+            for number, _ in batch:
+                reject(number, "Conflicted with a concurrent change; retry the row.")
+            return
+        report["created"] += created
+        report["updated"] += len(ids)
+        updated_ids.extend(ids)
+
+    for number, record in records:
+        values, error = (None, record) if isinstance(record, str) else clean(record)
+        if error is None and values['name'] in seen:
+            error = "Duplicate name in this import."
+        if error is not None:
+            reject(number, error)
+            continue
+        seen.add(values['name'])
+        batch.append((number, values))
+        if len(batch) == batch_size:
+            flush()
+            batch = []
+    if batch:
+        flush()
+    return report, updated_ids
+
+
+def export_response(outlet_id, format, batch_size=BATCH_SIZE):
+    """Stream an outlet's menu as CSV or NDJSON, `batch_size` rows per fetch and chunk."""
+    query = (
+        select(*(getattr(MenuItem, field) for field in FIELDS))
+        .where(MenuItem.outlet_id == outlet_id)
+        .order_by(MenuItem.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if format == 'csv':
+            writer.writerow(FIELDS)
+        for rows in db.session.execute(query).partitions():
+            if format == 'csv':
+                writer.writerows(rows)
+            else:
+                for row in rows:
+                    buffer.write(json.dumps(dict(zip(FIELDS, row))))
+                    buffer.write('\n')
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    return Response(stream_with_context(generate()), mimetype=MEDIA_TYPES[format], headers={
+        'Content-Disposition': f'attachment; filename="outlet-{outlet_id}-menu.{format}"',
+    })
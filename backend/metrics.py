@@ -0,0 +1,260 @@
+import bisect
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from extensions import PerApp
+
+logger = logging.getLogger(__name__)
+
+ENVIRON_KEY = 'nextgen.request_stats'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# Statements kept per request for the slow-request log.
+MAX_STATEMENTS = 100
+
+# (RequestStats measure, metric name, buckets, help)
+HISTOGRAMS = (
+    ('seconds', 'http_request_duration_seconds', LATENCY_BUCKETS,
+     'Time from receiving a request to sending the last byte.'),
+    ('sql_count', 'http_request_sql_statements', STATEMENT_BUCKETS, 'SQL statements executed per request.'),
+    ('sql_seconds', 'http_request_sql_seconds', LATENCY_BUCKETS, 'Time spent executing SQL per request.'),
+    ('size', 'http_response_size_bytes', SIZE_BUCKETS, 'Response body size.'),
+)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestStats:
+    """What one request cost; created by the WSGI middleware, filled in as it runs."""
+    __slots__ = ('started', 'seconds', 'method', 'path', 'resource', 'status', 'size',
+                 'sql_count', 'sql_seconds', 'statements')
+
+    def __init__(self, environ, keep_statements):
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.method = environ.get('REQUEST_METHOD', 'GET')
+        query = environ.get('QUERY_STRING')
+        self.path = environ.get('PATH_INFO', '') + (f'?{query}' if query else '')
+        self.resource = 'unmatched'
+        self.status = '500'
+        self.size = 0
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.statements = [] if keep_statements else None
+
+
+class RequestMetrics:
+    """Per-resource latency, status, SQL and response size metrics in Prometheus text format.
+
+    A WSGI middleware times each request to its last byte, so streamed
+    bodies count in full and unhandled exceptions still count as 500s.
+    Requests are labelled with their flask_restful resource class and
+    method; SQL statements are counted and timed with engine events while
+    a request context is active. Metrics are per process: with several
+    gunicorn workers a scrape of /metrics reads whichever worker answers.
+
+    With SLOW_REQUEST_THRESHOLD (seconds) set, the SQL of each request is
+    kept too; requests over the threshold are logged with their slowest
+    statements, and the SLOW_REQUEST_KEEP worst are served by /metrics/slow.
+    """
+
+    def __init__(self, slow_threshold=None, slow_keep=20):
+        self.slow_threshold = slow_threshold
+        self.slow_keep = slow_keep
+        self._histograms = {}  # (resource, method) -> [Histogram per HISTOGRAMS entry]
+        self._statuses = defaultdict(int)  # (resource, method, status) -> count
+        self._slow = []  # min-heap of (seconds, sequence, record)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.slow_threshold = app.config.get('SLOW_REQUEST_THRESHOLD') or None
+        self.slow_keep = app.config.get('SLOW_REQUEST_KEEP', self.slow_keep)
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        app.wsgi_app = _Middleware(app.wsgi_app, self)
+
+        @app.before_request
+        def _label_request():
+            stats = request.environ.get(ENVIRON_KEY)
+            if stats is None:
+                return
+            view = current_app.view_functions.get(request.endpoint)
+            view_class = getattr(view, 'view_class', None)
+            if view_class is not None:
+                stats.resource = view_class.__name__
+            elif request.endpoint is not None:
+                stats.resource = request.endpoint
+            g.request_stats = stats
+
+    def observe(self, stats):
+        stats.seconds = seconds = time.perf_counter() - stats.started
+        key = (stats.resource, stats.method)
+        with self._lock:
+            histograms = self._histograms.get(key)
+            if histograms is None:
+                histograms = self._histograms[key] = [Histogram(buckets) for _, _, buckets, _ in HISTOGRAMS]
+            for histogram, (measure, _, _, _) in zip(histograms, HISTOGRAMS):
+                histogram.observe(getattr(stats, measure))
+            self._statuses[key + (stats.status,)] += 1
+        if self.slow_threshold is not None and seconds >= self.slow_threshold:
+            self._record_slow(stats, seconds)
+
+    def _record_slow(self, stats, seconds):
+        statements = sorted(stats.statements or (), key=lambda statement: statement[1], reverse=True)
+        record = {
+            "method": stats.method,
+            "path": stats.path,
+            "resource": stats.resource,
+            "status": int(stats.status),
+            "seconds": round(seconds, 6),
+            "sql_statements": stats.sql_count,
+            "sql_seconds": round(stats.sql_seconds, 6),
+            "statements": [{"sql": sql, "seconds": round(took, 6)} for sql, took in statements],
+        }
+        logger.warning(
+            'Slow request %s %s (%s) %d in %.0f ms: %d statements, %.0f ms in SQL%s',
+            stats.method, stats.path, stats.resource, record['status'], seconds * 1000,
+            stats.sql_count, stats.sql_seconds * 1000,
+            ''.join(f'\n  {took * 1000:8.1f} ms  {sql}' for sql, took in statements[:5]),
+        )
+        with self._lock:
+            entry = (seconds, next(self._sequence), record)
+            if len(self._slow) < self.slow_keep:
+                heapq.heappush(self._slow, entry)
+            elif self._slow and seconds > self._slow[0][0]:
+                heapq.heapreplace(self._slow, entry)
+
+    def slow_requests(self):
+        """The worst requests seen, slowest first."""
+        with self._lock:
+            return [record for _, _, record in sorted(self._slow, key=lambda entry: entry[0], reverse=True)]
+
+    def render(self):
+        with self._lock:
+            histograms = {key: [(list(h.counts), h.sum, h.count) for h in values]
+                          for key, values in self._histograms.items()}
+            statuses = dict(self._statuses)
+
+        lines = []
+        for index, (_, metric, buckets, help) in enumerate(HISTOGRAMS):
+            lines += [f'# HELP {metric} {help}', f'# TYPE {metric} histogram']
+            for (resource, method), values in sorted(histograms.items()):
+                counts, total, count = values[index]
+                labels = f'resource="{_escape(resource)}",method="{method}"'
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{labels}}} {_number(total)}')
+                lines.append(f'{metric}_count{{{labels}}} {count}')
+
+        lines += ['# HELP http_requests_total Requests by resource, method and status.',
+                  '# TYPE http_requests_total counter']
+        for (resource, method, status), count in sorted(statuses.items()):
+            lines.append(f'http_requests_total{{resource="{_escape(resource)}",method="{method}",status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+class _Middleware:
+    def __init__(self, wsgi_app, metrics):
+        self.wsgi_app = wsgi_app
+        self.metrics = metrics
+
+    def __call__(self, environ, start_response):
+        stats = environ[ENVIRON_KEY] = RequestStats(environ, self.metrics.slow_threshold is not None)
+
+        def capture_status(status, headers, exc_info=None):
+            stats.status = status.split(' ', 1)[0]
+            return start_response(status, headers, exc_info)
+
+        try:
+            body = self.wsgi_app(environ, capture_status)
+        except BaseException:
+            self.metrics.observe(stats)
+            raise
+        return _Body(body, stats, self.metrics)
+
+
+class _Body:
+    """Counts the bytes of a response body and records the request once it is sent or closed."""
+
+    def __init__(self, body, stats, metrics):
+        self.body = body
+        self.stats = stats
+        self.metrics = metrics
+        self.observed = False
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.stats.size += len(chunk)
+            yield chunk
+        self._observe()
+
+    def close(self):
+        try:
+            close = getattr(self.body, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._observe()
+
+    def _observe(self):
+        if not self.observed:
+            self.observed = True
+            self.metrics.observe(self.stats)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_statement(conn, cursor, statement, parameters, context, executemany):
+    context.metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_statement(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    stats = g.get('request_stats')
+    if stats is None:
+        return
+    took = time.perf_counter() - context.metrics_started
+    stats.sql_count += 1
+    stats.sql_seconds += took
+    if stats.statements is not None and len(stats.statements) < MAX_STATEMENTS:
+        stats.statements.append((statement, took))
+
+
+request_metrics = PerApp('request_metrics', RequestMetrics)
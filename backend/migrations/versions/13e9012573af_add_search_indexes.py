@@ -0,0 +1,51 @@
+"""add search indexes
+
+Revision ID: 13e9012573af
+Revises: b1ac49316249
+Create Date: 2026-10-18 08:39:10.124611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '13e9012573af'
+down_revision = 'b1ac49316249'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    ('outlets', 'outlets_fts', ('name', 'description')),
+    ('menu_items', 'menu_items_fts', ('name', 'description', 'category')),
+)
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other databases use the LIKE fallback in search.py.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, fts, columns in INDEXES:
+        cols = ', '.join(columns)
+        new = ', '.join(f'new.{column}' for column in columns)
+        old = ', '.join(f'old.{column}' for column in columns)
+        op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+                   f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5')")
+        op.execute(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+                   f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END")
+        op.execute(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+                   f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END")
+        op.execute(f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+                   f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+                   f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END")
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, fts, columns in INDEXES:
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {fts}")
@@ -1,9 +1,15 @@
-from sqlalchemy.orm import validates
+from datetime import datetime, timedelta
+
+from flask import current_app
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy.sql import func
 
-from config import db, bcrypt
+from config import db
+from passwords import hasher
+from serialization import PlannedSerializerMixin as SerializerMixin
+
+# Largest value an Integer column holds on every supported database (PostgreSQL's is 32-bit).
+INTEGER_MAX = 2 ** 31 - 1
 
 class User(db.Model, SerializerMixin):
     __tablename__ = 'users'
@@ -26,25 +32,13 @@ class User(db.Model, SerializerMixin):
 
     @password_hash.setter
     def password_hash(self, password):
-        hashed_password = bcrypt.generate_password_hash(password.encode('utf-8')).decode('utf-8')
-        self._password_hash = hashed_password
+        self._password_hash = hasher.hash(password)
 
     def authenticate(self, password):
-        return bcrypt.check_password_hash(self._password_hash, password.encode('utf-8'))
-    
-    @validates('name')
-    def validate_name(self, key, name):
-        existing = User.query.filter_by(name=name).first()
-        if existing:
-            raise ValueError("Username must be unique.")
-        return name
-    
-    @validates('email')
-    def validate_email(self, key, email):
-        existing = User.query.filter_by(email=email).first()
-        if existing:
-            raise ValueError("Email must be unique.")
-        return email
+        return hasher.verify(self._password_hash, password)
+
+    # Uniqueness of name and email is enforced by the table's unique
+    # constraints; see users.conflict_message for how violations surface.
     
     def __repr__(self):
         return f"<Customer {self.name}, Email: {self.email}>"
@@ -71,10 +65,10 @@ class Outlet(db.Model, SerializerMixin):
     name = db.Column(db.String)
     contact = db.Column(db.String)
     img_url = db.Column(db.String)
-    cuisine_id = db.Column(db.Integer, db.ForeignKey('cuisines.id'))
+    cuisine_id = db.Column(db.Integer, db.ForeignKey('cuisines.id'), index=True)
     description = db.Column(db.String)
 
-    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
 
     owner = db.relationship('User', back_populates='outlets')
     cuisine = db.relationship('Cuisine', back_populates='outlets')
@@ -86,13 +80,17 @@ class Outlet(db.Model, SerializerMixin):
 class MenuItem(db.Model, SerializerMixin):
     __tablename__ = 'menu_items'
     serialize_rules = ('-outlet.menu_items', '-order_items.menu_item',)
+    __table_args__ = (
+        # Menu imports upsert on this key.
+        db.UniqueConstraint('outlet_id', 'name', name='uq_menu_items_outlet_id_name'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
     description = db.Column(db.String)
     price = db.Column(db.Integer)
     category = db.Column(db.String)
-    outlet_id = db.Column(db.Integer, db.ForeignKey('outlets.id'))
+    outlet_id = db.Column(db.Integer, db.ForeignKey('outlets.id'), index=True)
 
     outlet = db.relationship('Outlet', back_populates='menu_items')
     order_items = db.relationship('OrderItem', back_populates='menu_item', cascade='all, delete-orphan')
@@ -103,11 +101,14 @@ class MenuItem(db.Model, SerializerMixin):
 class Order(db.Model, SerializerMixin):
     __tablename__ = 'orders'
     serialize_rules = ('-user.orders', '-order_items.order', '-reservation.order',)
+    __table_args__ = (
+        db.Index('ix_orders_status_created_at', 'status', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     status = db.Column(db.String, nullable=False)
     total_price = db.Column(db.Float, nullable=False, default=0)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
 
     user = db.relationship('User', back_populates='orders')
@@ -122,10 +123,10 @@ class OrderItem(db.Model, SerializerMixin):
     serialize_rules = ('-order.order_items', '-menu_item.order_items',)
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'))
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), index=True)
     sub_total = db.Column(db.Float)
     quantity = db.Column(db.Integer)
-    menuitem_id = db.Column(db.Integer, db.ForeignKey('menu_items.id'))
+    menuitem_id = db.Column(db.Integer, db.ForeignKey('menu_items.id'), index=True)
 
     order = db.relationship('Order', back_populates='order_items')
     menu_item = db.relationship('MenuItem', back_populates='order_items')
@@ -135,26 +136,37 @@ class OrderItem(db.Model, SerializerMixin):
 
 class Table(db.Model, SerializerMixin):
     __tablename__ = 'tables'
-    serialize_rules = ('-reservations.table',)
+    serialize_rules = ('-reservations.table', '-booking_version')
 
     id = db.Column(db.Integer, primary_key=True)
     table_number = db.Column(db.Integer, unique=True, nullable=False)
-    is_available = db.Column(db.String)
+    capacity = db.Column(db.Integer, nullable=False, default=4, server_default='4')
+    # Bumped by every booking; see availability.book.
+    booking_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     reservations = db.relationship('Reservation', back_populates='table', cascade='all, delete-orphan')
     
     def __repr__(self):
-        return f"<Table #{self.table_number}, Available: {self.is_available}>"
+        return f"<Table #{self.table_number}, Seats: {self.capacity}>"
+
+def default_end_time(context):
+    minutes = current_app.config.get('RESERVATION_DURATION', 90)
+    return context.get_current_parameters()['booking_time'] + timedelta(minutes=minutes)
 
 class Reservation(db.Model, SerializerMixin):
     __tablename__ = 'reservations'
     serialize_rules = ('-user.reservations', '-order.reservation', '-table.reservations',)
+    __table_args__ = (
+        # Also serves lookups on table_id alone.
+        db.Index('ix_reservations_table_id_booking_time', 'table_id', 'booking_time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), index=True)
     table_id = db.Column(db.Integer, db.ForeignKey('tables.id'))
-    booking_time = db.Column(db.DateTime, nullable=False)
+    booking_time = db.Column(db.DateTime, nullable=False, index=True)
+    end_time = db.Column(db.DateTime, nullable=False, default=default_end_time)
     no_of_people = db.Column(db.Integer)
     status = db.Column(db.String)
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
@@ -167,3 +179,55 @@ class Reservation(db.Model, SerializerMixin):
         return f"<Reservation ID: {self.id}, Table: {self.table_id}, Status: {self.status}>"
     
 
+
+
+class OutletDailySales(db.Model):
+    __tablename__ = 'outlet_daily_sales'
+
+    outlet_id = db.Column(db.Integer, db.ForeignKey('outlets.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<OutletDailySales Outlet: {self.outlet_id}, Day: {self.day}, Revenue: {self.revenue}>"
+
+class MenuItemDailySales(db.Model):
+    __tablename__ = 'menu_item_daily_sales'
+
+    menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_items.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<MenuItemDailySales MenuItem: {self.menu_item_id}, Day: {self.day}, Revenue: {self.revenue}>"
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    # Workers sync on this, not on id: ids can be reused once the table is
+    # purged empty, and can commit out of order.
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken {self.jti}, Expires: {self.expires_at}>"
+
+class OrderEvent(db.Model):
+    __tablename__ = 'order_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), nullable=False)  # 'created', 'updated' or 'deleted'
+    order_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer)
+    outlet_ids = db.Column(db.String, nullable=False, default=',')  # ",3,7," so LIKE '%,3,%' matches
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<OrderEvent {self.id}: Order {self.order_id} {self.kind}>"
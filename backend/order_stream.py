@@ -0,0 +1,258 @@
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from flask import Response
+from sqlalchemy import delete, event, func, or_, select
+
+from config import db
+from extensions import PerApp
+from models import MenuItem, Order, OrderEvent, OrderItem
+
+ORDER_RULES = ('-reservation', '-order_items', '-user')
+BACKLOG_LIMIT = 1000
+
+
+class Subscription:
+    __slots__ = ('user_id', 'outlet_id', 'queue', 'ready', 'overflowed', 'closed')
+
+    def __init__(self, user_id, outlet_id, queue_size):
+        self.user_id = user_id
+        self.outlet_id = outlet_id
+        self.queue = deque(maxlen=queue_size)
+        self.ready = threading.Event()
+        self.overflowed = False
+        self.closed = False
+
+    @property
+    def key(self):
+        if self.outlet_id is not None:
+            return ('outlet', self.outlet_id)
+        if self.user_id is not None:
+            return ('user', self.user_id)
+        return ('all', None)
+
+
+class OrderStreamHub:
+    """Fans order changes out to Server-Sent Events subscribers.
+
+    Handlers record an `OrderEvent` row in the same transaction as the
+    order change, so every worker sees every commit. One poller thread
+    per process, running only while someone is subscribed, reads the new
+    rows and hands each pre-encoded frame to the matching subscribers'
+    bounded queues. Subscribers are indexed by their filter, so a publish
+    touches only the clients that want it. An idle client costs a queue and
+    an Event, not a thread of the hub's own; gunicorn_sse.conf.py serves the
+    stream from gevent workers so connections do not hold OS threads either.
+
+    Ids are assigned at insert, not at commit, so a transaction holding a
+    lower id can commit after a higher one was polled. Like the revocation
+    sync, every poll therefore re-reads the last `sync_overlap` seconds of
+    events as well and skips the ids it already published.
+    """
+
+    def __init__(self, poll_interval=0.5, heartbeat=15.0, queue_size=100, retention=3600.0, sync_overlap=60.0):
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self.retention = retention
+        self.sync_overlap = sync_overlap
+        self.app = None
+        self._subscribers = {}  # filter key -> set of Subscription
+        self._count = 0
+        self._last_id = 0
+        self._polled_since = None  # start of the last poll, in created_at's clock
+        self._published = {}  # id -> created_at of the events published within the overlap
+        self._purged_at = float('-inf')
+        self._poller = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.poll_interval = app.config.get('ORDER_STREAM_POLL_INTERVAL', self.poll_interval)
+        self.heartbeat = app.config.get('ORDER_STREAM_HEARTBEAT', self.heartbeat)
+        self.queue_size = app.config.get('ORDER_STREAM_QUEUE_SIZE', self.queue_size)
+        self.retention = app.config.get('ORDER_EVENTS_RETENTION', self.retention)
+        self.sync_overlap = app.config.get('ORDER_STREAM_SYNC_OVERLAP', self.sync_overlap)
+
+    # -- recording (request side) -------------------------------------- #
+
+    def record(self, kind, order):
+        """Stage an event for `order` on the current session; it is published on commit."""
+        outlet_ids = db.session.execute(
+            select(MenuItem.outlet_id).distinct()
+            .join(OrderItem, OrderItem.menuitem_id == MenuItem.id)
+            .where(OrderItem.order_id == order.id, MenuItem.outlet_id.is_not(None))
+        ).scalars().all()
+        payload = {"id": order.id} if kind == 'deleted' else order.to_dict(rules=ORDER_RULES)
+        db.session.add(OrderEvent(
+            kind=kind,
+            order_id=order.id,
+            user_id=order.user_id,
+            outlet_ids=',' + ''.join(f'{outlet_id},' for outlet_id in sorted(outlet_ids)),
+            payload=json.dumps(payload),
+        ))
+        db.session.info['order_events'] = True
+
+        now = time.monotonic()
+        if now - self._purged_at >= self.retention / 10:
+            self._purged_at = now
+            cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+            db.session.execute(delete(OrderEvent).where(OrderEvent.created_at < cutoff))
+
+    def record_items_changed(self, order_id):
+        """Stage an 'updated' event for the order whose items changed, with the outlets they now span."""
+        order = db.session.get(Order, order_id)
+        if order is not None:
+            self.record('updated', order)
+
+    def notify(self):
+        """Wake this process's poller so local subscribers see a commit at once."""
+        self._wake.set()
+
+    # -- subscribing (streaming side) ---------------------------------- #
+
+    def subscribe(self, user_id=None, outlet_id=None):
+        subscription = Subscription(user_id, outlet_id, self.queue_size)
+        with self._lock:
+            if self._poller is None:
+                # Start from the current tail; older events are only sent as a backlog.
+                self._polled_since = datetime.utcnow()
+                self._last_id = db.session.execute(select(func.max(OrderEvent.id))).scalar() or 0
+                self._published = dict(db.session.execute(
+                    select(OrderEvent.id, OrderEvent.created_at)
+                    .where(OrderEvent.created_at >= self._polled_since - timedelta(seconds=self.sync_overlap))
+                ).all())
+                self._poller = threading.Thread(target=self._run, name='order-stream', daemon=True)
+                self._poller.start()
+            self._subscribers.setdefault(subscription.key, set()).add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            subscribers = self._subscribers.get(subscription.key)
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.key]
+            self._count -= 1
+        subscription.ready.set()
+
+    def backlog(self, subscription, after_id):
+        """Frames for events after `after_id` that the subscriber missed (`Last-Event-ID`).
+
+        Resuming goes by id, because `Last-Event-ID` is all a client sends.
+        So an event that commits late, with an id below `after_id`, after the
+        client disconnected, is not replayed. Re-sending the overlap window
+        instead would repeat events the client already has.
+        """
+        query = select(OrderEvent).where(OrderEvent.id > after_id)
+        if subscription.user_id is not None:
+            query = query.where(OrderEvent.user_id == subscription.user_id)
+        if subscription.outlet_id is not None:
+            query = query.where(OrderEvent.outlet_ids.like(f'%,{subscription.outlet_id},%'))
+        rows = db.session.execute(query.order_by(OrderEvent.id).limit(BACKLOG_LIMIT)).scalars()
+        return [(row.id, _frame(row.id, row.kind, row.payload)) for row in rows]
+
+    def response(self, subscription, backlog=()):
+        stream = Response(self._stream(subscription, backlog), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        })
+        # Runs even if the client goes away before the generator starts.
+        stream.call_on_close(lambda: self.unsubscribe(subscription))
+        return stream
+
+    def _stream(self, subscription, backlog):
+        # The poller publishes each event once, but may also publish one the
+        # backlog already replayed. Ids are not in commit order, so dedupe by id.
+        replayed = set()
+        yield f'retry: {int(self.poll_interval * 1000) + 1000}\n\n'
+        for event_id, frame in backlog:
+            replayed.add(event_id)
+            yield frame
+        while not subscription.closed:
+            if not subscription.ready.wait(self.heartbeat):
+                yield ': keepalive\n\n'
+                continue
+            subscription.ready.clear()
+            if subscription.overflowed:
+                subscription.overflowed = False
+                yield 'event: resync\ndata: {}\n\n'
+            while subscription.queue:
+                event_id, frame = subscription.queue.popleft()
+                if event_id not in replayed:
+                    yield frame
+
+    # -- fan-out -------------------------------------------------------- #
+
+    def _run(self):
+        with self.app.app_context():
+            while True:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                with self._lock:
+                    if not self._count:
+                        self._poller = None
+                        return
+                try:
+                    self._poll()
+                except Exception:
+                    self.app.logger.exception("Order stream poll failed")
+                finally:
+                    db.session.remove()
+
+    def _poll(self):
+        started = datetime.utcnow()
+        since = self._polled_since - timedelta(seconds=self.sync_overlap)
+        rows = db.session.execute(
+            select(OrderEvent.id, OrderEvent.kind, OrderEvent.user_id, OrderEvent.outlet_ids,
+                   OrderEvent.payload, OrderEvent.created_at)
+            .where(or_(OrderEvent.id > self._last_id, OrderEvent.created_at >= since))
+            .order_by(OrderEvent.id)
+        ).all()
+        for id, kind, user_id, outlet_ids, payload, created_at in rows:
+            if id in self._published:
+                continue
+            self.publish(id, _frame(id, kind, payload), user_id,
+                         [int(outlet_id) for outlet_id in outlet_ids.split(',') if outlet_id])
+            self._published[id] = created_at
+            self._last_id = max(self._last_id, id)
+        for id in [id for id, created_at in self._published.items() if created_at < since]:
+            del self._published[id]
+        self._polled_since = started
+
+    def publish(self, event_id, frame, user_id, outlet_ids):
+        keys = [('all', None), ('user', user_id)] + [('outlet', outlet_id) for outlet_id in outlet_ids]
+        with self._lock:
+            for key in keys:
+                for subscription in self._subscribers.get(key, ()):
+                    if subscription.user_id is not None and subscription.user_id != user_id:
+                        continue
+                    if len(subscription.queue) == subscription.queue.maxlen:
+                        subscription.overflowed = True
+                    subscription.queue.append((event_id, frame))
+                    subscription.ready.set()
+
+    def stats(self):
+        with self._lock:
+            return {"subscribers": self._count, "last_event_id": self._last_id, "polling": self._poller is not None}
+
+
+def _frame(event_id, kind, payload):
+    return f'id: {event_id}\nevent: {kind}\ndata: {payload}\n\n'
+
+
+order_hub = PerApp('order_hub', OrderStreamHub)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _notify_after_commit(session):
+    if session.info.pop('order_events', False):
+        order_hub.notify()
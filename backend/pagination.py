@@ -0,0 +1,168 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from itertools import islice
+
+from flask import Response, request, stream_with_context
+from flask_restful import abort
+
+import representations
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# ?stream= value -> media type of the streamed list.
+STREAM_FORMATS = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+# Rows fetched, serialized and flushed per chunk of a streamed list.
+STREAM_BATCH = 1000
+
+
+def encode_cursor(last_id):
+    payload = json.dumps({'id': last_id}).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))['id'])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        abort(400, error="Invalid cursor.")
+
+
+def _coerce(name, value, type_):
+    try:
+        return type_(value)
+    except (TypeError, ValueError):
+        abort(400, error=f"Invalid value for '{name}'.")
+
+
+def parse_datetime(name, value):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        abort(400, error=f"'{name}' must be an ISO 8601 date or datetime.")
+
+
+def apply_filters(query, filters=None, date_filters=None):
+    """Push the request's filter params down into the SQL WHERE clause.
+
+    `filters` maps a query param to either a column (compared for equality,
+    coerced to the column's Python type) or a `(type, build)` pair where
+    `build(value)` returns the SQL criterion. `date_filters` maps a prefix to
+    a datetime column and enables `<prefix>_from` / `<prefix>_to` params.
+    """
+    for name, spec in (filters or {}).items():
+        value = request.args.get(name)
+        if value is None:
+            continue
+        if isinstance(spec, tuple):
+            type_, build = spec
+            query = query.filter(build(_coerce(name, value, type_)))
+        else:
+            query = query.filter(spec == _coerce(name, value, spec.type.python_type))
+
+    for prefix, column in (date_filters or {}).items():
+        start = request.args.get(f'{prefix}_from')
+        end = request.args.get(f'{prefix}_to')
+        if start is not None:
+            query = query.filter(column >= parse_datetime(f'{prefix}_from', start))
+        if end is not None:
+            query = query.filter(column < parse_datetime(f'{prefix}_to', end))
+    return query
+
+
+def paging_requested():
+    return 'limit' in request.args or 'cursor' in request.args
+
+
+def _accepts_ndjson():
+    return request.accept_mimetypes.best_match(tuple(STREAM_FORMATS.values())) == STREAM_FORMATS['ndjson']
+
+
+def stream_requested():
+    """Whether the request asks for a streamed list at all; `stream_format` validates how."""
+    return 'stream' in request.args or _accepts_ndjson()
+
+
+def stream_format():
+    """'json' or 'ndjson' when the request opted into a streamed list, else None.
+
+    `?stream=json` (or `?stream=1`) streams a JSON array, `?stream=ndjson`
+    or `Accept: application/x-ndjson` one object per line.
+    """
+    value = request.args.get('stream')
+    if value is None:
+        return 'ndjson' if _accepts_ndjson() else None
+    value = {'1': 'json', 'true': 'json'}.get(value.lower(), value.lower())
+    if value not in STREAM_FORMATS:
+        abort(400, error=f"'stream' must be one of {', '.join(STREAM_FORMATS)}.")
+    return value
+
+
+def stream(query, serialize, format):
+    """Respond with every row of `query`, encoded and sent STREAM_BATCH rows at a time.
+
+    Rows are fetched with `yield_per`, so neither the ORM objects nor the
+    encoded body are ever held in full: memory and time to first byte do
+    not grow with the table.
+    """
+    def generate():
+        dumps = representations.dumps
+        # The array opens with the first batch, so the first byte waits for the first row.
+        separator = '['
+        rows = iter(query.yield_per(STREAM_BATCH))
+        while batch := list(islice(rows, STREAM_BATCH)):
+            encoded = [dumps(serialize(row)) for row in batch]
+            if format == 'json':
+                yield separator + ','.join(encoded)
+                separator = ','
+            else:
+                yield '\n'.join(encoded) + '\n'
+        if format == 'json':
+            yield '[]\n' if separator == '[' else ']\n'
+
+    return Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[format],
+                    headers={'X-Accel-Buffering': 'no'})
+
+
+def paginate(query, model, serialize, filters=None, date_filters=None, options=()):
+    """Filter `query` and return one keyset page, serialized with `serialize`.
+
+    Pages are ordered by primary key and continue strictly after the id
+    encoded in `?cursor=`, so every page is an index range scan no matter
+    how deep it is. `?order=desc` walks newest first. Requests without
+    `limit` or `cursor` keep the original bare-list response, or stream the
+    whole list when they ask to (see `stream_format`). `options` are the
+    loader options for the relationships `serialize` reads.
+    """
+    query = apply_filters(query, filters, date_filters).options(*options)
+
+    descending = request.args.get('order', 'asc') == 'desc'
+    key = model.id.desc() if descending else model.id.asc()
+
+    format = stream_format()
+    if format is not None:
+        if paging_requested():
+            abort(400, error="A streamed list has no pages; drop 'limit' and 'cursor'.")
+        return stream(query.order_by(key), serialize, format)
+
+    if not paging_requested():
+        return [serialize(row) for row in query.order_by(key).all()]
+
+    limit = _coerce('limit', request.args.get('limit', DEFAULT_PAGE_SIZE), int)
+    if limit < 1:
+        abort(400, error="'limit' must be a positive integer.")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        last_id = decode_cursor(cursor)
+        query = query.filter(model.id < last_id if descending else model.id > last_id)
+
+    rows = query.order_by(key).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return {
+        "items": [serialize(row) for row in rows[:limit]],
+        "next_cursor": next_cursor,
+    }
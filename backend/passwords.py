@@ -0,0 +1,111 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config import bcrypt
+from extensions import PerApp
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the bcrypt queue is full; the caller should answer 503."""
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated pool instead of on every request thread.
+
+    At most `max_concurrency` hashes run at once and at most `queue_size`
+    more may wait; beyond that `PasswordHasherBusy` is raised immediately so
+    a login burst cannot tie up every worker thread and starve cheap reads.
+    """
+
+    def __init__(self, rounds=12, max_concurrency=None, queue_size=None, retry_after=1):
+        self.configure(rounds, max_concurrency, queue_size, retry_after)
+
+    def configure(self, rounds=12, max_concurrency=None, queue_size=None, retry_after=1):
+        self.rounds = rounds
+        self.max_concurrency = max_concurrency or os.cpu_count() or 2
+        self.queue_size = self.max_concurrency * 4 if queue_size is None else queue_size
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(self.max_concurrency + self.queue_size)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.configure(
+            rounds=app.config.get('BCRYPT_LOG_ROUNDS', 12),
+            max_concurrency=app.config.get('BCRYPT_MAX_CONCURRENCY'),
+            queue_size=app.config.get('BCRYPT_QUEUE_SIZE'),
+            retry_after=app.config.get('BCRYPT_RETRY_AFTER', 1),
+        )
+
+    def _pool(self):
+        # Created on first use so forked workers each start their own threads.
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix='bcrypt')
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            return self._pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        hashed = self._run(bcrypt.generate_password_hash, password.encode('utf-8'), self.rounds)
+        return hashed.decode('utf-8')
+
+    def hash_many(self, passwords):
+        """Hash `passwords` concurrently, in order, with at most `max_concurrency` in flight.
+
+        Each hash in flight holds a slot like a single `hash` does, so the
+        queue stays open to logins. A slot that is not free waits for this
+        call's oldest hash to finish; `PasswordHasherBusy` is raised only
+        when there is none to wait for.
+        """
+        pool = self._pool()
+        hashes, in_flight = [], deque()
+
+        def finish_oldest():
+            try:
+                hashes.append(in_flight.popleft().result().decode('utf-8'))
+            finally:
+                self._slots.release()
+
+        try:
+            for password in passwords:
+                while len(in_flight) >= self.max_concurrency or not self._slots.acquire(blocking=False):
+                    if not in_flight:
+                        raise PasswordHasherBusy()
+                    finish_oldest()
+                try:
+                    in_flight.append(pool.submit(bcrypt.generate_password_hash, password.encode('utf-8'),
+                                                 self.rounds))
+                except BaseException:
+                    self._slots.release()
+                    raise
+            while in_flight:
+                finish_oldest()
+        finally:
+            # Only after an interruption: free the slots of what is left, once its thread is done.
+            for future in in_flight:
+                if not future.cancel():
+                    future.exception()
+                self._slots.release()
+        return hashes
+
+    def verify(self, password_hash, password):
+        return self._run(bcrypt.check_password_hash, password_hash, password.encode('utf-8'))
+
+    def needs_rehash(self, password_hash):
+        try:
+            return int(password_hash.split('$')[2]) < self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+
+hasher = PerApp('password_hasher', PasswordHasher)
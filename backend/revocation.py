@@ -0,0 +1,87 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from config import db, jwt
+from extensions import PerApp
+from models import RevokedToken
+
+
+class RevocationStore:
+    """Revoked JWT ids shared by every worker through the `revoked_tokens` table.
+
+    Each process mirrors the table in memory and only reads the rows revoked
+    since its last sync, at most once per `sync_interval` seconds, so an
+    authenticated request normally never touches the database. Every sync
+    re-reads the last `sync_overlap` seconds as well, so a row whose
+    transaction committed after a sync that started later than its
+    `revoked_at` (or a worker with a clock slightly behind) is still seen.
+    Rows are deleted once their token has expired, since an expired token
+    is rejected before the blocklist is consulted.
+    """
+
+    def __init__(self, sync_interval=1.0, purge_interval=300.0, sync_overlap=60.0):
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self.sync_overlap = sync_overlap
+        self._revoked = {}  # jti -> expiry as a unix timestamp
+        self._revoked_since = None  # start of the last sync, in revoked_at's clock
+        self._synced_at = self._purged_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.sync_interval = app.config.get('JWT_REVOCATION_SYNC_INTERVAL', self.sync_interval)
+        self.purge_interval = app.config.get('JWT_REVOCATION_PURGE_INTERVAL', self.purge_interval)
+        self.sync_overlap = app.config.get('JWT_REVOCATION_SYNC_OVERLAP', self.sync_overlap)
+
+    def revoke(self, jti, expires):
+        expires_at = datetime.fromtimestamp(expires, timezone.utc).replace(tzinfo=None)
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(RevokedToken.__table__.insert().values(jti=jti, expires_at=expires_at))
+        except IntegrityError:
+            pass  # already revoked
+        with self._lock:
+            self._revoked[jti] = expires
+
+    def is_revoked(self, jti):
+        if jti in self._revoked:
+            return True
+        if time.monotonic() - self._synced_at >= self.sync_interval:
+            self._sync()
+        return jti in self._revoked
+
+    def _sync(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._synced_at < self.sync_interval:
+                return
+            started = datetime.utcnow()
+            query = select(RevokedToken.jti, RevokedToken.expires_at)
+            if self._revoked_since is not None:
+                query = query.where(
+                    RevokedToken.revoked_at >= self._revoked_since - timedelta(seconds=self.sync_overlap))
+            with db.engine.begin() as conn:
+                rows = conn.execute(query).all()
+                if now - self._purged_at >= self.purge_interval:
+                    conn.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow()))
+                    self._purged_at = now
+
+            for jti, expires_at in rows:
+                self._revoked[jti] = expires_at.replace(tzinfo=timezone.utc).timestamp()
+            self._revoked_since = started
+            cutoff = time.time()
+            for jti in [jti for jti, expires in self._revoked.items() if expires < cutoff]:
+                del self._revoked[jti]
+            self._synced_at = now
+
+
+revocations = PerApp('revocations', RevocationStore)
+
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return revocations.is_revoked(jwt_payload["jti"])
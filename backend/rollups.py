@@ -0,0 +1,210 @@
+from collections import defaultdict
+from datetime import date, datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from config import db
+from models import MenuItem, MenuItemDailySales, Order, OrderItem, OutletDailySales
+
+ROLLUPS = (
+    (OutletDailySales, 'outlet_id'),
+    (MenuItemDailySales, 'menu_item_id'),
+)
+
+
+def _day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    return value or date.today()
+
+
+def snapshot(session, order_ids=None):
+    """Aggregate the rollup contributions of `order_ids` (or of every order).
+
+    Returns `{(model, key, day): [order_count, quantity, revenue]}` read from
+    what is currently in the database, so it can be taken before and after a
+    write and the difference applied to the rollup tables.
+    """
+    totals = defaultdict(lambda: [0, 0, 0.0])
+    if order_ids is not None and not order_ids:
+        return totals
+
+    query = (
+        select(
+            Order.id, Order.created_at, MenuItem.outlet_id, OrderItem.menuitem_id,
+            OrderItem.quantity, OrderItem.sub_total,
+        )
+        .select_from(OrderItem)
+        .join(Order, OrderItem.order_id == Order.id)
+        .join(MenuItem, OrderItem.menuitem_id == MenuItem.id)
+    )
+    if order_ids is not None:
+        query = query.where(Order.id.in_(order_ids))
+
+    seen = set()
+    rows = session.execute(query.execution_options(yield_per=10000))
+    for order_id, created_at, outlet_id, menu_item_id, quantity, sub_total in rows:
+        day = _day(created_at)
+        for model, key in ((OutletDailySales, outlet_id), (MenuItemDailySales, menu_item_id)):
+            if key is None:
+                continue
+            row = totals[(model, key, day)]
+            if (model, key, order_id) not in seen:
+                seen.add((model, key, order_id))
+                row[0] += 1
+            row[1] += quantity or 0
+            row[2] += sub_total or 0
+    return totals
+
+
+def _upsert(session, model, key_name, key, day, values):
+    order_count, quantity, revenue = values
+    table = model.__table__
+    dialect = session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = insert(table).values(
+            {key_name: key, 'day': day, 'order_count': order_count, 'quantity': quantity, 'revenue': revenue}
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key_name, 'day'],
+            set_={
+                'order_count': table.c.order_count + stmt.excluded.order_count,
+                'quantity': table.c.quantity + stmt.excluded.quantity,
+                'revenue': table.c.revenue + stmt.excluded.revenue,
+            },
+        )
+        session.execute(stmt)
+    else:
+        updated = session.execute(
+            table.update()
+            .where(table.c[key_name] == key, table.c.day == day)
+            .values(
+                order_count=table.c.order_count + order_count,
+                quantity=table.c.quantity + quantity,
+                revenue=table.c.revenue + revenue,
+            )
+        )
+        if not updated.rowcount:
+            session.execute(table.insert().values(
+                {key_name: key, 'day': day, 'order_count': order_count, 'quantity': quantity, 'revenue': revenue}
+            ))
+
+    session.execute(
+        delete(table).where(table.c[key_name] == key, table.c.day == day, table.c.order_count <= 0)
+    )
+
+
+def apply_delta(session, before, after):
+    """Add `after - before` to the rollup tables inside the current transaction."""
+    for bucket in set(before) | set(after):
+        old, new = before.get(bucket, (0, 0, 0.0)), after.get(bucket, (0, 0, 0.0))
+        delta = [n - o for n, o in zip(new, old)]
+        if not any(delta):
+            continue
+        model, key, day = bucket
+        key_name = dict(ROLLUPS)[model]
+        _upsert(session, model, key_name, key, day, delta)
+
+
+def _affected_orders(session):
+    """Orders whose rollup contribution may change in the pending flush."""
+    order_ids, pending = set(), []
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, OrderItem):
+            state = inspect(obj)
+            history = state.attrs.order_id.history
+            order_ids.update(i for i in history.deleted if i is not None)
+            if obj.order_id is not None:
+                order_ids.add(obj.order_id)
+            if obj in session.new or obj.order_id is None:
+                pending.append(obj)
+        elif isinstance(obj, Order) and obj.id is not None:
+            if obj in session.deleted or inspect(obj).attrs.created_at.history.has_changes():
+                order_ids.add(obj.id)
+        elif isinstance(obj, MenuItem) and obj.id is not None:
+            if inspect(obj).attrs.outlet_id.history.has_changes():
+                order_ids.update(session.scalars(
+                    select(OrderItem.order_id).where(OrderItem.menuitem_id == obj.id)
+                ))
+    return order_ids, pending
+
+
+@event.listens_for(db.session, 'before_flush')
+def _capture_rollups(session, flush_context, instances):
+    with session.no_autoflush:
+        order_ids, pending = _affected_orders(session)
+    if not order_ids and not pending:
+        return
+    session.info.setdefault('rollup_changes', []).append(
+        (order_ids, pending, snapshot(session, order_ids))
+    )
+
+
+@event.listens_for(db.session, 'after_flush')
+def _apply_rollups(session, flush_context):
+    for order_ids, pending, before in session.info.pop('rollup_changes', []):
+        order_ids = order_ids | {item.order_id for item in pending if item.order_id is not None}
+        apply_delta(session, before, snapshot(session, order_ids))
+
+
+def rebuild(session):
+    """Recompute both rollup tables from `orders` and `order_items`."""
+    rows = defaultdict(list)
+    for (model, key, day), (order_count, quantity, revenue) in snapshot(session).items():
+        rows[model].append({
+            dict(ROLLUPS)[model]: key, 'day': day,
+            'order_count': order_count, 'quantity': quantity, 'revenue': revenue,
+        })
+    for model, _ in ROLLUPS:
+        session.execute(delete(model))
+        if rows[model]:
+            session.execute(model.__table__.insert(), rows[model])
+
+
+def stored(session):
+    totals = {}
+    for model, key_name in ROLLUPS:
+        for row in session.scalars(select(model)):
+            totals[(model, getattr(row, key_name), row.day)] = [row.order_count, row.quantity, row.revenue]
+    return totals
+
+
+def mismatches(session):
+    """Buckets where the rollup tables disagree with the raw order tables."""
+    expected, actual = snapshot(session), stored(session)
+    return sorted(
+        (
+            (model.__tablename__, key, day, actual.get((model, key, day)), expected.get((model, key, day)))
+            for model, key, day in set(expected) | set(actual)
+            if [round(v, 2) for v in expected.get((model, key, day), [0, 0, 0])]
+            != [round(v, 2) for v in actual.get((model, key, day), [0, 0, 0])]
+        ),
+        key=lambda row: (row[0], row[1], row[2]),
+    )
+
+
+rollups_cli = AppGroup('rollups', help='Maintain the daily sales rollup tables.')
+
+
+@rollups_cli.command('rebuild')
+def rebuild_command():
+    """Recompute the rollup tables from scratch."""
+    rebuild(db.session)
+    db.session.commit()
+    click.echo('Rollup tables rebuilt.')
+
+
+@rollups_cli.command('check')
+def check_command():
+    """Compare the rollup tables against the raw order tables."""
+    rows = mismatches(db.session)
+    for table, key, day, actual, expected in rows:
+        click.echo(f'{table} {key} {day}: stored {actual}, expected {expected}')
+    if rows:
+        raise SystemExit(1)
+    click.echo('Rollup tables match the order tables.')
+
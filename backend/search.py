@@ -0,0 +1,167 @@
+import re
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import event, or_, select, text
+
+from config import db
+from models import MenuItem, Outlet
+
+MAX_RESULTS = 100
+# A query that is a single prefix of at most SHORT_PREFIX letters matches most
+# of the catalog, so it ranks only CANDIDATES of its matches; that keeps
+# its latency flat as the catalog grows. Every other query ranks all matches.
+SHORT_PREFIX = 2
+CANDIDATES = 1000
+
+# (model, FTS table, indexed columns, bm25 weight per column): names count most.
+INDEXES = {
+    'outlets': (Outlet, 'outlets_fts', ('name', 'description'), (10.0, 1.0)),
+    'menu_items': (MenuItem, 'menu_items_fts', ('name', 'description', 'category'), (10.0, 1.0, 4.0)),
+}
+
+
+def schema(table, fts, columns):
+    """DDL for an external-content FTS5 index on `table` and the triggers that sync it.
+
+    The triggers run inside the writing transaction, so ORM handlers, Core
+    bulk inserts and cascaded deletes all keep the index current. SQLite
+    drops triggers when a batch migration recreates the table, so such a
+    migration must create them again (or run `flask search rebuild`).
+    """
+    cols = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4 5')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+    ]
+
+
+def enabled(session):
+    return session.get_bind().dialect.name == 'sqlite'
+
+
+def terms(q):
+    return re.findall(r'\w+', (q or '').lower())
+
+
+def match_expression(words, partial=True):
+    r"""Every word must match; only the one still being typed is a prefix.
+
+    Whole words read the term's doclist incrementally, while a prefix
+    longer than the indexed prefix lengths has its doclist merged up front,
+    so the earlier words are matched exactly. \w+ words never need escaping.
+    """
+    quoted = [f'"{word}"' for word in words]
+    if partial:
+        quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search(session, q, kinds=tuple(INDEXES), limit=20, candidates=None):
+    """Rank outlets and menu items against `q`, best first.
+
+    Returns `{kind: [model instances]}`. Each kind costs one FTS5 MATCH
+    for the ranked ids plus one primary-key IN query for the rows. Matches
+    are ranked by bm25, except that a lone one- or two-letter prefix ranks
+    only its first `candidates` matches (SEARCH_CANDIDATES). On databases
+    without FTS5 it falls back to a case-insensitive LIKE on the same
+    columns.
+    """
+    words = terms(q)
+    partial = bool(words) and not q[-1:].isspace()
+    short = partial and len(words) == 1 and len(words[0]) <= SHORT_PREFIX
+    limit = min(limit, MAX_RESULTS)
+    candidates = candidates or current_app.config.get('SEARCH_CANDIDATES', CANDIDATES)
+    results = {}
+    for kind in kinds:
+        model, fts, columns, weights = INDEXES[kind]
+        if not words:
+            results[kind] = []
+            continue
+        if not enabled(session):
+            results[kind] = session.execute(select(model).where(*(
+                or_(*(getattr(model, column).ilike(f'%{word}%') for column in columns)) for word in words
+            )).order_by(model.name).limit(limit)).scalars().all()
+            continue
+
+        score = f"bm25({fts}, {', '.join(map(str, weights))})"
+        if short:
+            statement = (f"SELECT rowid FROM (SELECT rowid, {score} AS score FROM {fts} WHERE {fts} MATCH :match "
+                         f"LIMIT :candidates) ORDER BY score LIMIT :limit")
+        else:
+            statement = f"SELECT rowid FROM {fts} WHERE {fts} MATCH :match ORDER BY {score} LIMIT :limit"
+        ids = session.execute(
+            text(statement),
+            {'match': match_expression(words, partial), 'candidates': max(candidates, limit), 'limit': limit},
+        ).scalars().all()
+        rows = session.execute(select(model).where(model.id.in_(ids))).scalars() if ids else ()
+        rows = {row.id: row for row in rows}
+        results[kind] = [rows[id] for id in ids if id in rows]
+    return results
+
+
+def install(session):
+    for kind, (model, fts, columns, _) in INDEXES.items():
+        for statement in schema(model.__tablename__, fts, columns):
+            session.execute(text(statement))
+
+
+def _create_index(fts, columns):
+    def create(table, conn, **kw):
+        if conn.dialect.name == 'sqlite':
+            for statement in schema(table.name, fts, columns):
+                conn.execute(text(statement))
+    return create
+
+
+def _drop_index(fts):
+    def drop(table, conn, **kw):
+        if conn.dialect.name == 'sqlite':
+            conn.execute(text(f'DROP TABLE IF EXISTS {fts}'))
+    return drop
+
+
+# Databases built with `db.create_all()` (seed.py, tests, `datagen --create-tables`)
+# get the indexes too; migrations create them in 13e9012573af.
+for model, fts, columns, _ in INDEXES.values():
+    event.listen(model.__table__, 'after_create', _create_index(fts, columns))
+    event.listen(model.__table__, 'before_drop', _drop_index(fts))
+
+
+def drop_triggers(session):
+    """Stop syncing the indexes, e.g. for a bulk load; `rebuild` brings them back."""
+    for _, fts, _, _ in INDEXES.values():
+        for suffix in ('ai', 'ad', 'au'):
+            session.execute(text(f'DROP TRIGGER IF EXISTS {fts}_{suffix}'))
+
+
+def rebuild(session):
+    """Create any missing index or trigger and repopulate both indexes from their tables."""
+    install(session)
+    for model, fts, _, _ in INDEXES.values():
+        session.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+        session.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('optimize')"))
+
+
+search_cli = AppGroup('search', help='Maintain the full-text search indexes.')
+
+
+@search_cli.command('rebuild')
+def rebuild_command():
+    """Recreate the search indexes and their triggers from the catalog tables."""
+    if not enabled(db.session):
+        raise click.ClickException('Full-text search indexes need SQLite with FTS5.')
+    rebuild(db.session)
+    db.session.commit()
+    click.echo('Search indexes rebuilt.')
+
@@ -1,8 +1,10 @@
-from app import app  
+from app import create_app
 from config import db
 from models import User, Cuisine, Outlet, MenuItem, Table, Order, OrderItem, Reservation
 from datetime import datetime, timedelta
 
+app = create_app()
+
 with app.app_context():
     print("Seeding database...")
 
@@ -89,10 +91,10 @@ with app.app_context():
     db.session.add_all(items)
 
     tables = [
-        Table(table_number=1, is_available="Yes"),
-        Table(table_number=2, is_available="Yes"),
-        Table(table_number=3, is_available="Yes"),
-        Table(table_number=4, is_available="No")
+        Table(table_number=1, capacity=4),
+        Table(table_number=2, capacity=6),
+        Table(table_number=3, capacity=4),
+        Table(table_number=4, capacity=8)
     ]
     db.session.add_all(tables)
 
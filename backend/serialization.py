@@ -0,0 +1,114 @@
+import threading
+
+from sqlalchemy import inspect as sql_inspect
+from sqlalchemy.orm import ColumnProperty, RelationshipProperty
+from sqlalchemy_serializer import SerializerMixin
+from sqlalchemy_serializer.lib.schema import Schema
+from sqlalchemy_serializer.serializer import Serializer
+
+SIMPLE_TYPES = (int, str, float, bool, type(None))
+
+_plans = {}
+_lock = threading.RLock()
+
+
+class Plan:
+    """A compiled serializer for one model under one rule set.
+
+    The column keys to emit and each relationship's nested plan are worked
+    out once with sqlalchemy-serializer's own `Schema`, so the rows produce
+    exactly what `SerializerMixin.to_dict` would without re-parsing rules
+    or inspecting the mapper per row.
+    """
+
+    def __init__(self, model, schema, values=None):
+        schema.update(only=model.serialize_only, extend=model.serialize_rules)
+        # Nested rows are formatted with the root model's options, as in to_dict.
+        self.values = values or Serializer(
+            date_format=model.date_format,
+            datetime_format=model.datetime_format,
+            time_format=model.time_format,
+            decimal_format=model.decimal_format,
+            tzinfo=None,
+            serialize_types=model.serialize_types,
+        )
+        self.columns, self.relationships, self.others = [], [], []
+
+        mapper = sql_inspect(model)
+        keys = schema.keys
+        if schema.is_greedy:
+            keys.update(attr.key for attr in mapper.attrs)
+        for key in sorted(keys, key=_mapper_order(mapper)):
+            if not schema.is_included(key=key):
+                continue
+            prop = mapper.attrs.get(key)
+            if isinstance(prop, ColumnProperty):
+                self.columns.append(key)
+            elif isinstance(prop, RelationshipProperty) and issubclass(prop.mapper.class_, SerializerMixin):
+                self.relationships.append([key, prop.uselist, prop.mapper.class_, schema.fork(key=key), None])
+            else:
+                self.others.append((key, schema.fork(key=key)))
+
+    def _nested(self, relationship):
+        if relationship[4] is None:
+            with _lock:
+                if relationship[4] is None:
+                    relationship[4] = Plan(relationship[2], relationship[3], self.values)
+        return relationship[4]
+
+    def __call__(self, obj):
+        state = obj.__dict__
+        serialize = self.values.serialize
+        res = {}
+        for key in self.columns:
+            try:
+                value = state[key]
+            except KeyError:
+                value = getattr(obj, key)
+            res[key] = value if isinstance(value, SIMPLE_TYPES) else serialize(value)
+
+        for relationship in self.relationships:
+            key, uselist = relationship[0], relationship[1]
+            value = getattr(obj, key)
+            if uselist:
+                res[key] = [self._nested(relationship)(item) for item in value] if value else []
+            else:
+                res[key] = None if value is None else self._nested(relationship)(value)
+
+        for key, schema in self.others:
+            serializer = Serializer(**self.values.opts._asdict())
+            serializer.schema = schema
+            res[key] = serializer(getattr(obj, key))
+        return res
+
+
+def _mapper_order(mapper):
+    order = {attr.key: index for index, attr in enumerate(mapper.attrs)}
+    return lambda key: (order.get(key, len(order)), key)
+
+
+def plan_for(model, rules=(), only=()):
+    key = (model, tuple(rules), tuple(only))
+    plan = _plans.get(key)
+    if plan is None:
+        with _lock:
+            plan = _plans.get(key)
+            if plan is None:
+                schema = Schema()
+                schema.update(only=only, extend=rules)
+                plan = _plans[key] = Plan(model, schema)
+    return plan
+
+
+class PlannedSerializerMixin(SerializerMixin):
+    """`SerializerMixin` whose `to_dict` runs a cached, precompiled plan.
+
+    Calls that override the formatting options, and models that define a
+    timezone, fall back to the original per-call serializer.
+    """
+
+    def to_dict(self, only=(), rules=(), **options):
+        overridden = any(value is not None for value in options.values())
+        if overridden or type(self).get_tzinfo is not SerializerMixin.get_tzinfo:
+            return super().to_dict(only=only, rules=rules, **options)
+        return plan_for(type(self), rules, only)(self)
@@ -0,0 +1,66 @@
+"""Concurrent bookings of the same tables must never overlap (availability.book's version guard)."""
+import random
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from benchmarks.booking_stress import double_bookings
+from config import TestConfig, db
+from models import Table
+
+THREADS = 16
+REQUESTS = 240
+TABLES = 2
+SLOTS = 4
+
+
+@pytest.fixture
+def app(tmp_path):
+    # A file, not ':memory:', so every thread's connection sees the same database.
+    config = type('BookingConfig', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'booking.db'}"})
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_concurrent_bookings_never_double_book(app):
+    tables = [Table(table_number=number, capacity=4) for number in range(1, TABLES + 1)]
+    db.session.add_all(tables)
+    db.session.commit()
+    table_ids = [table.id for table in tables]
+
+    day = datetime(2099, 1, 1, 18, 0)
+    rng = random.Random(1)
+    jobs = [
+        {'table_id': rng.choice(table_ids), 'party_size': 2,
+         'booking_time': (day + timedelta(minutes=30 * rng.randrange(SLOTS))).isoformat()}
+        for _ in range(REQUESTS)
+    ]
+    statuses = Counter()
+    lock = threading.Lock()
+    start_line = threading.Barrier(THREADS)
+
+    def worker(index):
+        client = app.test_client()
+        start_line.wait()
+        for job in jobs[index::THREADS]:
+            status = client.post('/reservations', json=job).status_code
+            with lock:
+                statuses[status] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert set(statuses) <= {201, 409, 503}, statuses
+    assert statuses[201] > 0
+    db.session.expire_all()
+    assert double_bookings(table_ids) == 0
@@ -0,0 +1,72 @@
+"""The planned `to_dict` must match sqlalchemy-serializer's for every rule set the API uses."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy_serializer import SerializerMixin
+
+from app import create_app
+from config import TestConfig, db
+from models import User, Cuisine, Outlet, MenuItem, Table, Order, OrderItem, Reservation
+from order_stream import ORDER_RULES
+
+# (model, rules, only): the resources' rules in app.py, plus ?fields= selections.
+CASES = [
+    (User, ('-orders', '-reservations', '-outlets'), ()),
+    (User, ('-orders', '-reservations', '-outlets'), ('id', 'name', 'email')),
+    (Cuisine, ('-outlets',), ()),
+    (Cuisine, ('-outlets',), ('id', 'name')),
+    (Outlet, ('-menu_items', '-owner'), ()),
+    (Outlet, ('-menu_items', '-owner'), ('id', 'name', 'cuisine_id', 'cuisine')),
+    (Outlet, ('-cuisine', '-menu_items', '-owner'), ()),
+    (Outlet, ('-menu_items', '-owner', '-cuisine'), ()),
+    (MenuItem, ('-outlet', '-order_items'), ()),
+    (MenuItem, ('-outlet', '-order_items'), ('id', 'name', 'price', 'outlet_id', 'category')),
+    (Order, ORDER_RULES, ()),
+    (Order, ORDER_RULES, ('id', 'status', 'created_at')),
+    (Order, ('-reservation', '-order_items', '-user-'), ()),
+    (Order, ('-reservation', '-user', '-order_items.menu_item'), ()),
+    (OrderItem, ('-order', '-menu_item'), ()),
+    (OrderItem, ('-order', '-menu_item'), ('id', 'quantity')),
+    (OrderItem, ('-order.order_items', '-order.user', '-order.reservation',
+                 '-menu_item.order_items', '-menu_item.outlet'), ()),
+    (Table, ('-outlet', '-reservations'), ()),
+    (Table, ('-outlet', '-reservations'), ('id', 'capacity')),
+    (Reservation, ('-user', '-table', '-order'), ()),
+    (Reservation, ('-user', '-table', '-order'), ('id', 'status', 'booking_time')),
+    (Reservation, ('-user.reservations', '-user.orders', '-user.outlets', '-table.reservations', '-order'), ()),
+]
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        owner = User(name='Diana', email='diana@example.com', phone_no=740000001, role='owner',
+                     _password_hash='x')
+        customer = User(name='Alice', email='alice@example.com', role='customer', _password_hash='x')
+        italian = Cuisine(name='Italian')
+        outlet = Outlet(name='Pasta Palace', contact='0700111222', cuisine=italian, owner=owner,
+                        description='Fresh pasta')
+        bare = Outlet(name='No Cuisine')
+        pasta = MenuItem(name='Spaghetti', description='Tomato sauce', price=800, category='Main', outlet=outlet)
+        soup = MenuItem(name='Minestrone', price=450, outlet=outlet)
+        order = Order(status='pending', total_price=1250.5, user=customer, created_at=datetime(2026, 1, 2, 12, 30))
+        empty = Order(status='cancelled', total_price=0)
+        order.order_items = [OrderItem(menu_item=pasta, quantity=1, sub_total=800.0),
+                             OrderItem(menu_item=soup, quantity=1, sub_total=450.5)]
+        table = Table(table_number=1, capacity=4)
+        reservation = Reservation(user=customer, table=table, order=order, no_of_people=2, status='confirmed',
+                                  booking_time=datetime(2026, 1, 2, 19, 0), end_time=datetime(2026, 1, 2, 20, 30))
+        db.session.add_all([owner, customer, italian, outlet, bare, pasta, soup, order, empty, table, reservation])
+        db.session.commit()
+        yield app
+
+
+@pytest.mark.parametrize('model, rules, only', CASES,
+                         ids=[f'{model.__name__}{list(rules)}{list(only) if only else ""}' for model, rules, only in CASES])
+def test_planned_to_dict_matches_serializer_mixin(app, model, rules, only):
+    rows = model.query.all()
+    assert rows
+    for row in rows:
+        assert row.to_dict(rules=rules, only=only) == SerializerMixin.to_dict(row, rules=rules, only=only)
@@ -0,0 +1,99 @@
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from config import db
+from models import User
+from passwords import hasher, PasswordHasherBusy
+
+REQUIRED_FIELDS = ('name', 'email', 'role', 'password')
+BATCH_SIZE = 500
+
+
+def conflict_message(error):
+    """Turn a unique-constraint IntegrityError on `users` into a readable message."""
+    detail = str(error.orig).lower()
+    if 'email' in detail:
+        return "Email must be unique."
+    if 'name' in detail:
+        return "Username must be unique."
+    return "User already exists"
+
+
+def _text(value):
+    return isinstance(value, str) and value.strip() != ''
+
+
+def bulk_create(rows, batch_size=BATCH_SIZE):
+    """Insert many users, checking uniqueness with one IN query per batch.
+
+    Returns `(created, errors, retry_from)` where `errors` lists
+    `{"index", "error"}` for every rejected row. Each batch's passwords are
+    hashed concurrently on the bcrypt pool and the batch is committed on
+    its own, so a conflict in one batch does not roll back the others. If
+    the pool is saturated, the import stops before the current batch and
+    `retry_from` is the index of its first row (None once every row is
+    done); the rows before it are committed and reported.
+    """
+    created, errors = 0, []
+    seen_names, seen_emails = set(), set()
+
+    for start in range(0, len(rows), batch_size):
+        batch = []
+        for index, row in enumerate(rows[start:start + batch_size], start):
+            if not isinstance(row, dict) or any(not _text(row.get(field)) for field in REQUIRED_FIELDS):
+                errors.append({"index": index, "error": f"Fields {', '.join(REQUIRED_FIELDS)} must be non-empty text."})
+            elif row['name'] in seen_names:
+                errors.append({"index": index, "error": "Username must be unique."})
+            elif row['email'] in seen_emails:
+                errors.append({"index": index, "error": "Email must be unique."})
+            else:
+                seen_names.add(row['name'])
+                seen_emails.add(row['email'])
+                batch.append((index, row))
+        if not batch:
+            continue
+
+        names = [row['name'] for _, row in batch]
+        emails = [row['email'] for _, row in batch]
+        taken_names, taken_emails = set(), set()
+        for name, email in db.session.execute(
+            select(User.name, User.email).where(or_(User.name.in_(names), User.email.in_(emails)))
+        ):
+            taken_names.add(name)
+            taken_emails.add(email)
+
+        indexes, values = [], []
+        for index, row in batch:
+            if row['name'] in taken_names:
+                errors.append({"index": index, "error": "Username must be unique."})
+            elif row['email'] in taken_emails:
+                errors.append({"index": index, "error": "Email must be unique."})
+            else:
+                indexes.append(index)
+                values.append({
+                    'name': row['name'], 'email': row['email'], 'phone_no': row.get('phone_no'),
+                    'role': row['role'],
+                })
+        if not values:
+            continue
+        try:
+            hashes = hasher.hash_many([rows[index]['password'] for index in indexes])
+        except PasswordHasherBusy:
+            db.session.rollback()
+            errors = sorted((error for error in errors if error["index"] < start), key=lambda error: error["index"])
+            return created, errors, start
+        for value, password_hash in zip(values, hashes):
+            value['_password_hash'] = password_hash
+
+        try:
+            db.session.execute(insert(User), values)
+            db.session.commit()
+            created += len(values)
+        except IntegrityError as error:
+            # Lost a race with a concurrent insert; the whole batch was rolled back.
+            db.session.rollback()
+            message = conflict_message(error)
+            errors.extend({"index": index, "error": message} for index in indexes)
+
+    errors.sort(key=lambda error: error["index"])
+    return created, errors, None
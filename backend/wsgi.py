@@ -0,0 +1,23 @@
+"""WSGI entry point:  gunicorn wsgi:app  (settings in gunicorn.conf.py)
+
+With `preload_app` the master imports this module and builds the app once;
+forked workers share those pages copy-on-write and start serving without
+importing anything. APP_CONFIG picks the config (an import path, `config.Config` by default).
+"""
+import os
+import time
+
+started = time.perf_counter()
+
+from app import create_app  # noqa: E402
+from config import db  # noqa: E402
+
+app = create_app(os.environ.get('APP_CONFIG', 'config.Config'))
+boot_seconds = time.perf_counter() - started
+
+
+def dispose_engines():
+    """Drop pooled connections inherited from the master without closing them under it."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
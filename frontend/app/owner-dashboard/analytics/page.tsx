@@ -31,53 +31,17 @@ export default function OwnerAnalytics() {
       try {
         setLoading(true);
         
-        // Fetch data from multiple endpoints
-        const [reservationsRes, ordersRes, menuItemsRes] = await Promise.all([
-          fetch('http://localhost:5555/reservations'),
-          fetch('http://localhost:5555/orders'),
-          fetch('http://localhost:5555/menu-items')
-        ]);
-
-        const reservations = await reservationsRes.json();
-        const orders = await ordersRes.json();
-        const menuItems = await menuItemsRes.json();
-
-        // Calculate analytics
-        const today = new Date().toISOString().split('T')[0];
-        const todayOrders = orders.filter((order: any) => 
-          order.created_at && order.created_at.startsWith(today)
-        );
-
-        // Find most ordered dish (simplified)
-        const dishCounts: { [key: string]: number } = {};
-        orders.forEach((order: any) => {
-          if (order.order_items) {
-            order.order_items.forEach((item: any) => {
-              const dishName = item.menu_item?.name || 'Unknown Dish';
-              dishCounts[dishName] = (dishCounts[dishName] || 0) + item.quantity;
-            });
-          }
-        });
-
-        const mostOrderedDish = Object.keys(dishCounts).reduce((a, b) => 
-          dishCounts[a] > dishCounts[b] ? a : b, 'No orders yet'
-        );
-
-        const totalRevenue = orders.reduce((sum: number, order: any) => 
-          sum + (order.total_price || 0), 0
-        );
-
-        const completedOrders = orders.filter((order: any) => 
-          order.status === 'delivered'
-        ).length;
+        // Aggregates are computed server-side; the response is a few hundred bytes
+        const summaryRes = await fetch('http://localhost:5555/analytics/summary');
+        const summary = await summaryRes.json();
 
         setAnalyticsData({
-          totalReservations: reservations.length,
-          totalOrdersToday: todayOrders.length,
-          mostOrderedDish,
-          totalRevenue,
+          totalReservations: summary.total_reservations,
+          totalOrdersToday: summary.orders_today,
+          mostOrderedDish: summary.most_ordered_dish?.name || 'No orders yet',
+          totalRevenue: summary.total_revenue,
           averageRating: 4.2, // Mock data - could be calculated from reviews
-          completionRate: orders.length > 0 ? Math.round((completedOrders / orders.length) * 100) : 0
+          completionRate: summary.completion_rate
         });
 
       } catch (error) {